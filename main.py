@@ -4,10 +4,17 @@ from src.build import (
     bld_g_sub,
     bld_subg_single_remove,
     bld_subg_multi_remove,
+    bld_removal_table,
     bld_sequence,
 )
 
-from src.drawing import draw_graph
+from src.io import read_json_sequence
+from src.cache import FigureCache, RemovalCache
+from src.drawing import draw_graph, draw_graphs, save_animation
+from src.export import write_svg, write_dot, write_node_link
+from src.joined import JoinedRemoval
+from src.planner import Planner
+from src import trace
 
 
 if __name__ == "__main__":
@@ -15,6 +22,9 @@ if __name__ == "__main__":
     f_in = "P{}_data_in".format(phase_number)
     f_out = "P{}_graphs_out".format(phase_number)
 
+    # record why nodes are classified, off by default
+    # trace.configure("debug", filepath="{}/_trace.jsonl".format(f_out))
+
     # Task #1: Building Overall Support Hierarchy
     G = bld_g_full(f_in)
 
@@ -26,23 +36,28 @@ if __name__ == "__main__":
         plt_save=False,
     )
 
+    # vector and data exports without matplotlib, in milliseconds
+    # write_svg(G, "{}/__full_structure.svg".format(f_out), plt_text=False)
+    # write_dot(G, "{}/__full_structure.dot".format(f_out))
+    # write_node_link(G, "{}/__full_structure.json".format(f_out))
+
     if phase_number == "3":
         # For Phase 3 figures
         steps = 25
 
         Ks = bld_g_sub(G, f_in, steps)
 
-        for K in Ks:
-            i = K.graph["step"]
-            name = f"phase3_subset_{i}.png"
-            draw_graph(
-                G=K,
-                filepath="{}/{}".format(f_out, name),
-                scale=1.2,
-                plt_show=False,
-                plt_save=True,
-                plt_text=True,
-            )
+        # one figure per worker process, all cores, figures that would not change are kept
+        figures = FigureCache()
+        draw_graphs(
+            Gs=Ks,
+            filepaths=["{}/phase3_subset_{}.png".format(f_out, K.graph["step"]) for K in Ks],
+            n_workers=None,
+            cache=figures,
+            scale=1.2,
+            plt_text=True,
+        )
+        print("\nfigures: {}".format(figures.stats()))
     else:
         # Task #2: Member Removal Sub-graphs
         # rm_membs = list(G.nodes())
@@ -56,7 +71,12 @@ if __name__ == "__main__":
         # rm_membs = ["SP1_4", "ES10", "SP1_2", "SP1_3", "RG1_6"]  # Phase 2a_3
         rm_membs = ["SP1_2", "SP1_3", "RG1_6"]  # Phase 2b
 
-        Ks = bld_subg_single_remove(G, rm_membs)
+        # Removal impact of all members in one pass, to rank members for reuse
+        # bld_removal_table(G, folder_out=f_out, name="_removal_table.csv")
+
+        # single removal results are shared with the joined subgraph
+        removals = RemovalCache()
+        Ks = bld_subg_single_remove(G, rm_membs, cache=removals)
 
         for rm_memb, K in zip(rm_membs, Ks):
             if K.number_of_nodes() > 1:
@@ -72,7 +92,9 @@ if __name__ == "__main__":
         # Joined Subgraphs
         name = "_".join(rm_membs)
         if len(rm_membs) > 1:
-            K_joined = bld_subg_multi_remove(G, Ks, rm_membs)
+            # updated by the changed members only when trying other rm_membs
+            joined = JoinedRemoval(G, cache=removals)
+            K_joined = bld_subg_multi_remove(G, Ks, rm_membs, joined=joined)
 
             draw_graph(
                 G=K_joined,
@@ -86,7 +108,24 @@ if __name__ == "__main__":
             K_joined = Ks[0]
 
         # Task #3: Sequence Generate
-        K_reduced_list, members = bld_sequence(K_joined, rm_membs)
+        # planner = Planner(strategy="beam", time_budget=30)  # no input() prompts
+        planner = None
+
+        # replay a script, e.g. a copy of a session recorded to "_<members>_session.json"
+        # script = read_json_sequence(f_out, "_{}_sequence.json".format(name))
+        script = None
+
+        K_reduced_list, members = bld_sequence(
+            K_joined,
+            rm_membs,
+            planner=planner,
+            script=script,
+            folder_out=f_out,
+            name="_{}_session.json".format(name),
+        )
+
+        # the whole sequence as one animation, .mp4 needs ffmpeg
+        save_animation(K_reduced_list, "{}/_{}_sequence.gif".format(f_out, name), scale=1.2)
 
         for K_reduced in K_reduced_list:
             i = K_reduced.graph["step"]
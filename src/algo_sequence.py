@@ -1,10 +1,11 @@
-import networkx as nx
-
 from src.algorithms import (
     node_draw_settings,
     _count_fixed_sides,
 )
 
+from src import trace
+from src.index import remove_nodes, get_type_index, get_component_index, track_node_types
+
 
 def _make_graph_title(step, nodes, nodes_robfxd):
     n_rmv = len(nodes)
@@ -41,7 +42,7 @@ def _update_rm_list(node_remove_step, rm_membs):
     if rm_membs:
         for n in node_remove_step:
             if n == rm_membs[0]:
-                print(f"--an active remove member, {n}, is removed")
+                trace.info("active_member_removed", node=n)
                 rm_membs.remove(n)
                 break
 
@@ -50,23 +51,22 @@ def _update_rm_list(node_remove_step, rm_membs):
 
 def _remove_disconnected_graphs(K):
     nodes_remove_disconnected = []
-    components = list(nx.weakly_connected_components(K))
     desired_n_types = ["end_2sides_fixed", "end_1sides_fixed", "end_foundation"]
 
-    for i, component in enumerate(components):
-        print("check connected component: {}".format(i + 1))
+    # components are tracked as nodes are removed, see index.ComponentIndex
+    component_index = get_component_index(K, desired_n_types)
 
-        # Check if all nodes in the component have specific node types
-        if all(K.nodes[n]["node_type"] in desired_n_types for n in component):
-            nodes_remove_disconnected.extend(list(component))
-            print(f"--Component of only fixed nodes: {nodes_remove_disconnected}")
+    for i in sorted(component_index.end_only):
+        component = component_index.members[i]
+        nodes_remove_disconnected.extend(list(component))
+        trace.info("fixed_component_removed", component=i + 1, nodes=component)
 
-    K.remove_nodes_from(nodes_remove_disconnected)
+    remove_nodes(K, nodes_remove_disconnected)
 
 
-def _relabel_graph(K, rm_membs):
+def _relabel_graph(K, rm_membs, nodes=None):
     # Re-label a node if it is now free from supporting others
-    for n in K.nodes():
+    for n in K.nodes() if nodes is None else nodes:
         n_type = K.nodes[n]["node_type"]
         in_deg = K.in_degree(n)
         num_fixed_sides = _count_fixed_sides(K, n)[0]
@@ -80,11 +80,11 @@ def _relabel_graph(K, rm_membs):
             node_draw_settings(K, n, "start")
 
 
-def _relabel_graph_robsupport(K):
+def _relabel_graph_robsupport(K, nodes=None):
     desired_n_types = ["end_2sides_fixed", "end_1sides_fixed", "end_foundation", "robsupport_fixed"]
     ignore_n_types = ["end_2sides_fixed", "end_1sides_fixed", "robsupport_fixed", "end_foundation"]
 
-    for n in K.nodes():
+    for n in K.nodes() if nodes is None else nodes:
         n_type = K.nodes[n]["node_type"]
         in_deg = K.in_degree(n)
         predecessors = list(K.predecessors(n))
@@ -95,7 +95,7 @@ def _relabel_graph_robsupport(K):
             and n_type not in ignore_n_types
             and K.nodes[predecessors[0]]["node_type"] == "robsupport_fixed"
         ):
-            print("-- make {} start, one fxd predecessors = {}".format(n, predecessors))
+            trace.debug("relabel_start", node=n, fxd_predecessors=predecessors)
             node_draw_settings(K, n, "start")
 
         # edge case, if on top is rob_support and end
@@ -103,28 +103,43 @@ def _relabel_graph_robsupport(K):
             attribute_values = [K.nodes[predecessor]["node_type"] for predecessor in predecessors]
 
             if set(attribute_values).issubset(desired_n_types):
-                print("-- make {} start, two fxd predecessors = {}".format(n, predecessors))
+                trace.debug("relabel_start", node=n, fxd_predecessors=predecessors)
                 node_draw_settings(K, n, "start")
 
 
-def _relabel_graph_ending(K):
+def _relabel_graph_ending(K, type_index=None):
     "if only these left, then make normal nodes = start nodes"
     desired_n_types = ["end_2sides_fixed", "end_1sides_fixed", "end_foundation", "normal"]
 
-    if all(K.nodes[n]["node_type"] in desired_n_types for n in K.nodes()):
+    if type_index is not None:
+        if all(node_type in desired_n_types for node_type in type_index.types()):
+            for n in type_index.nodes(["normal"]):
+                node_draw_settings(K, n, "start")
+
+    elif all(K.nodes[n]["node_type"] in desired_n_types for n in K.nodes()):
         for n in K.nodes():
             if K.nodes[n]["node_type"] == "normal":
                 node_draw_settings(K, n, "start")
 
 
-def _relabel_graph_fixed(K):
+def _relabel_graph_fixed(K, type_index=None):
     """make start node if only end node on top and no other start members in graph
     algo will terminate otherwise
     """
     desired_n_types = ["end_2sides_fixed", "end_1sides_fixed", "end_foundation"]
 
-    if "start" not in [K.nodes[n]["node_type"] for n in K.nodes()]:
-        for n in K.nodes():
+    if type_index is not None:
+        no_start = not type_index.count("start")
+    else:
+        no_start = "start" not in [K.nodes[n]["node_type"] for n in K.nodes()]
+
+    if no_start:
+        if type_index is not None:
+            nodes = type_index.nodes(["normal", "normal_1side_fixed"])
+        else:
+            nodes = K.nodes()
+
+        for n in nodes:
             node_type = K.nodes[n]["node_type"]
             in_deg_norm = K.in_degree(n) - _count_fixed_sides(K, n)[0]
             n_predeces = list(K.predecessors(n))
@@ -138,17 +153,48 @@ def _relabel_graph_fixed(K):
 ###############################################
 
 
+def _check_selection(selected, options, what):
+    for n in selected:
+        if n not in options:
+            raise ValueError("cannot {} {}, choose from {}".format(what, n, options))
+
+
 def find_n_active(K, n_type):
-    n_rmv = [
-        n for n, data in K.nodes(data=True) if "node_type" in data and data["node_type"] in n_type
-    ]
+    type_index = get_type_index(K)
+
+    if type_index is not None:
+        n_rmv = type_index.nodes(n_type)
+    else:
+        n_rmv = [
+            n
+            for n, data in K.nodes(data=True)
+            if "node_type" in data and data["node_type"] in n_type
+        ]
 
     n_rmv = sorted(n_rmv, key=lambda x: x[1])
 
     return n_rmv
 
 
-def set_rob_support(K):
+def set_rob_support(K, n_robsupport=None):
+    """
+    Add robot supports at the start of a step.
+
+    Parameters:
+    - K (networkx.MultiDiGraph): The current subgraph, modified.
+    - n_robsupport (list, optional): Nodes to support. Asked for with `input()` if None.
+
+    Returns:
+    - list: The supported nodes.
+    """
+    if n_robsupport is not None:
+        for n in n_robsupport:
+            if n not in K:
+                raise ValueError("rob support {} is not in the current subgraph".format(n))
+            node_draw_settings(K, n, "robsupport_fixed")
+
+        return list(n_robsupport)
+
     user_input = input("Do you want to add rob support? (Y/N): ").strip().lower()
 
     if user_input == "y":
@@ -164,11 +210,22 @@ def set_rob_support(K):
     return input_list_str
 
 
-def select_n_active(K, n_active, n2):
-    # if it's empty
-    if not n_active:
-        n_active = n2
+def _support_options(n_active, n2, n_rmv_select):
+    # choose items not already supported or removed in this step
+    return [item for item in n_active if item not in n2 and item not in n_rmv_select]
+
+
+def _input_indexes(user_string, options):
+    user_input = input(user_string)
+
+    indexes_str = user_input.split()
+    indexes_int = [int(x) for x in indexes_str]
+
+    return [options[i] for i in indexes_int]
+
 
+def _input_n_active(n_active, n2):
+    """Ask for the members removed and supported in this step with `input()`."""
     # if a member was user-specified at start
     if n2:
         str1 = "{} just supported, ".format(n2)
@@ -177,32 +234,49 @@ def select_n_active(K, n_active, n2):
 
     ### REMOVE
     user_string = "{}choose idx of RMV members {}: int ... int ".format(str1, n_active)
-    user_input = input(user_string)
-
-    indexes_str = user_input.split()
-    indexes_int = [int(x) for x in indexes_str]
-
-    n_rmv_select = [n_active[i] for i in indexes_int]
+    n_rmv_select = _input_indexes(user_string, n_active)
 
     ### SUPPORT
-    # choose items not in already supported in user specified
-    n_active2 = [item for item in n_active if item not in n2]
+    n_active2 = _support_options(n_active, n2, n_rmv_select)
 
-    # choose from items not already removed
     if n_rmv_select:
         str2 = "{} just removed, ".format(n_rmv_select)
-        n_active2 = [item for item in n_active2 if item not in n_rmv_select]
     else:
         str2 = "nothing just removed, "
 
     user_string = "{}{}choose idx of SUPPORT members {}: int ... int ".format(str1, str2, n_active2)
-    user_input = input(user_string)
+    n_support_select = _input_indexes(user_string, n_active2)
 
-    indexes_str = user_input.split()
-    indexes_int = [int(x) for x in indexes_str]
+    return n_rmv_select, n_support_select
+
+
+def select_n_active(K, n_active, n2, n_rmv_select=None, n_support_select=None):
+    """
+    Select the members removed and supported in this step.
+
+    Parameters:
+    - K (networkx.MultiDiGraph): The current subgraph, modified.
+    - n_active (list): Active nodes, from find_n_active.
+    - n2 (list): Nodes just supported by set_rob_support.
+    - n_rmv_select (list, optional): Nodes to remove, from the active nodes.
+    - n_support_select (list, optional): Active nodes to support, besides n2.
+
+    Returns:
+    - tuple: (removed nodes, supported nodes). Asked for with `input()` if the selections are None.
+    """
+    interactive = n_rmv_select is None or n_support_select is None
 
-    n_support_select = [n_active2[i] for i in indexes_int]
-    n_support_select.extend(n2)
+    # if it's empty
+    if not n_active:
+        n_active = n2
+
+    if interactive:
+        n_rmv_select, n_support_select = _input_n_active(n_active, n2)
+    else:
+        _check_selection(n_rmv_select, n_active, "remove")
+        _check_selection(n_support_select, _support_options(n_active, n2, n_rmv_select), "support")
+
+    n_support_select = list(n_support_select) + list(n2)
 
     n_support_select = [item for item in n_support_select if item not in n_rmv_select]
 
@@ -215,13 +289,16 @@ def select_n_active(K, n_active, n2):
         for n in n_rmv_select:
             node_draw_settings(K, n, "start")
 
-    print("In this step: {} removed, {} supported".format(n_rmv_select, n_support_select))
+    if interactive:
+        print("In this step: {} removed, {} supported".format(n_rmv_select, n_support_select))
+    else:
+        trace.info("step_selection", removed=n_rmv_select, supported=n_support_select)
 
     return n_rmv_select, n_support_select
 
 
 def crnt_subg_process(K, n_rmv_step, rm_membs, rmv_disconnect=False):
-    K.remove_nodes_from(n_rmv_step)
+    remove_nodes(K, n_rmv_step)
     rm_membs = _update_rm_list(n_rmv_step, rm_membs)
 
     if rmv_disconnect:
@@ -229,15 +306,39 @@ def crnt_subg_process(K, n_rmv_step, rm_membs, rmv_disconnect=False):
 
 
 def crnt_subg_save(K, step, n_rmv_step, n_robfxd_step, saved_K, saved_seq):
+    """save the current state, saved_K is a SnapshotStore that keeps the changes since the
+    last step.
+    """
     K.graph["title"] = _make_graph_title(step, n_rmv_step, n_robfxd_step)
     K.graph["step"] = step
 
-    saved_K.append(K.copy())
+    saved_K.append(K)
     saved_seq.append(n_rmv_step)
 
 
 def new_subg_relabel(K, rm_membs):
-    _relabel_graph(K, rm_membs)
-    _relabel_graph_ending(K)
-    _relabel_graph_fixed(K)
-    _relabel_graph_robsupport(K)
+    """relabel after a step. The first call checks all nodes, later calls only the nodes
+    whose relabel conditions may have changed (see index.TypeIndex), and the graph-wide
+    conditions from the node type index.
+    """
+    type_index = get_type_index(K)
+
+    if type_index is None:
+        _relabel_graph(K, rm_membs)
+        _relabel_graph_ending(K)
+        _relabel_graph_fixed(K)
+        _relabel_graph_robsupport(K)
+
+        track_node_types(K)
+        return
+
+    dirty = type_index.pop_dirty()
+    if rm_membs:
+        dirty.add(rm_membs[0])
+
+    nodes = [n for n in dirty if n in K]
+
+    _relabel_graph(K, rm_membs, nodes)
+    _relabel_graph_ending(K, type_index)
+    _relabel_graph_fixed(K, type_index)
+    _relabel_graph_robsupport(K, nodes)
@@ -1,5 +1,10 @@
+from collections import deque
+
 import networkx as nx
 from src.drawing import node_draw_settings, edge_draw_settings
+from src import trace
+from src.index import get_fixed_index
+from src.views import overlay_view
 
 
 def _check_if_fixed_exists_multi(G, node, nodes_to_check):
@@ -14,7 +19,9 @@ def _check_if_fixed_exists_multi(G, node, nodes_to_check):
     Returns:
     - True if the node has fixed connections with any node in the list in both directions, False otherwise.
     """
-    return any(G.has_edge(node, n) and G.has_edge(n, node) for n in nodes_to_check)
+    partners = get_fixed_index(G).partners.get(node, set())
+
+    return not partners.isdisjoint(nodes_to_check)
 
 
 def _check_if_fixed_exists(G, node1, node2):
@@ -29,12 +36,12 @@ def _check_if_fixed_exists(G, node1, node2):
     Returns:
     - True if node1 has fixed connections with node2 in both directions, False otherwise.
     """
-    return G.has_edge(node1, node2) and G.has_edge(node2, node1)
+    return node2 in get_fixed_index(G).partners.get(node1, ())
 
 
 def _count_fixed_sides(G, n):
     """
-    Check on how many sides node is fixed.
+    Check on how many sides node is fixed, using the fixed connection index of G.
 
     Parameters:
     - G (networkx.Graph): The graph.
@@ -44,31 +51,25 @@ def _count_fixed_sides(G, n):
     - The count of fixed sides and a list of fixed edges as tuples.
     """
 
-    fixed_e_count = 0
-    e_fixed = []
-
-    neighbors = list(G.neighbors(n))
+    partners = get_fixed_index(G).partners.get(n, ())
 
-    for neighbor in neighbors:
-        if _check_if_fixed_exists(G, n, neighbor):
-            fixed_e_count += 1
-            e_fixed.append((n, neighbor))  # save as tuple ('n1','n2')
+    e_fixed = [(n, neighbor) for neighbor in partners]  # save as tuple ('n1','n2')
 
-    return fixed_e_count, e_fixed
+    return len(e_fixed), e_fixed
 
 
-def _find_adjacent_nodes(G, n, n_queue, n_saved):
+def _find_adjacent_nodes(G, n, n_queue, n_seen):
     """
     Find adjacent nodes to a given node in a directed graph.
 
     Parameters:
     - G (networkx.DiGraph): The directed graph.
     - n: The target node.
-    - n_queue (list): The queue of nodes to check.
-    - n_saved (list): The list of nodes already visited.
+    - n_queue (collections.deque): The queue of nodes to check.
+    - n_seen (set): The nodes already visited or in the queue.
 
     Returns:
-    - Updated node queue and list of visited nodes.
+    - Updated node queue and set of seen nodes.
     """
 
     successors = list(G.successors(n))
@@ -77,9 +78,12 @@ def _find_adjacent_nodes(G, n, n_queue, n_saved):
     adjacent_nodes = successors + predecessors
 
     # don't add already visited or already in queue
-    n_queue.extend(set(adjacent_nodes) - set(n_saved).union(set(n_queue)))
+    n_new = set(adjacent_nodes) - n_seen
 
-    return n_queue, n_saved
+    n_queue.extend(n_new)
+    n_seen.update(n_new)
+
+    return n_queue, n_seen
 
 
 def _check_node_type(G, n_check, rm_membs):
@@ -95,8 +99,6 @@ def _check_node_type(G, n_check, rm_membs):
     - str: A string representing the type of the node, such as "remove_start", "remove", "start",
       "end_foundation", "end_2sides_fixed", "danger_1side_fixed", "normal_1side_fixed", or "normal".
     """
-    print("\nCHECKING NODE TYPE OF: {}".format(n_check))
-
     if not isinstance(rm_membs, list):
         rm_membs = [rm_membs]
 
@@ -106,37 +108,56 @@ def _check_node_type(G, n_check, rm_membs):
 
     if n_check in rm_membs and in_degree == 0:
         # don't add to queue if remove is also start node
-        print("--REMOVE & START NODE")
+        reason = "REMOVE & START NODE"
         node_type = "remove_start"
     elif n_check in rm_membs:
-        print("--REMOVE NODE")
+        reason = "REMOVE NODE"
         node_type = "remove"
     elif in_degree == 0:
-        print("--START NODE, in_degree=0")
+        reason = "START NODE, in_degree=0"
         node_type = "start"
     elif out_degree == 0:
-        print("--END NODE, out_degree=0")
+        reason = "END NODE, out_degree=0"
         node_type = "end_foundation"
     elif fixed_sides_count == 2:
-        print("--END NODE, fixed on TWO sides")
+        reason = "END NODE, fixed on TWO sides"
         node_type = "end_2sides_fixed"
     elif fixed_sides_count == 1:
         if _check_if_fixed_exists_multi(G, n_check, rm_membs):
-            print("-- DANGER NODE, fixed on ONE side, the fixed connection is to removal member")
+            reason = "DANGER NODE, fixed on ONE side, the fixed connection is to removal member"
             node_type = "danger_1side_fixed"
         elif not any(G.has_edge(n_check, m) for m in rm_membs):
-            print("-- DANGER NODE, fixed on ONE side, connected somewhere in structure")
+            reason = "DANGER NODE, fixed on ONE side, connected somewhere in structure"
             node_type = "danger_1side_fixed"
         else:
-            print("-- NORMAL REMOVE NODE, fixed on ONE side, normal connection to member to remove")
+            reason = "NORMAL REMOVE NODE, fixed on ONE side, normal connection to member to remove"
             node_type = "normal_1side_fixed"
     else:
-        print("-- NORMAL NODE")
+        reason = "NORMAL NODE"
         node_type = "normal"
 
+    _trace_node_type(G, n_check, rm_membs, node_type, reason, fixed_sides_count)
+
     return node_type
 
 
+def _trace_node_type(G, n_check, rm_membs, node_type, reason, fixed_sides_count):
+    """Emit the debug event of _check_node_type, with the degrees the node type is based on."""
+    if trace.level > trace.DEBUG:
+        return
+
+    trace.debug(
+        "node_type",
+        node=n_check,
+        node_type=node_type,
+        reason=reason,
+        rm_membs=rm_membs,
+        in_degree=G.in_degree(n_check),
+        out_degree=G.out_degree(n_check),
+        fixed_sides=fixed_sides_count,
+    )
+
+
 def _check_connected(G, K, fxd_n_cut_rmv, fxd_n_check):
     """
     Check if fixed members have at least TWO other support connections after the removal of the member.
@@ -154,38 +175,40 @@ def _check_connected(G, K, fxd_n_cut_rmv, fxd_n_check):
 
     """
 
-    print("\nCHECKING IF NODES {} HAVE ENOUGH SUPPORT".format(fxd_n_check))
-
     n_safe_fix1 = []
     n_safe_fix2 = []
     n_notsafe = []
 
     for n in fxd_n_check:
-        print("\nCHECK FIXED NODE {}".format(n))
-
         e_G = list(G.out_edges(n))  # member supported by (START)
         e_K = list(K.out_edges(n))  # supporting members to be removed
 
         num_supports = len(e_G) - len(e_K)
-        print("-- {} supports left. These members being removed: {}".format(num_supports, e_K))
+        e_added_back = []
 
         flag = False
         # if fixed edge is not being cut, add back
         for u, v in e_K:
             if _check_if_fixed_exists(G, u, v):
                 if u not in fxd_n_cut_rmv and v not in fxd_n_cut_rmv:
-                    print("-- fixed not cut, ADD support back in")
+                    e_added_back.append((u, v))
                     flag = True
                     num_supports += 1
-                else:
-                    print("-- fixed is cut, DO NOT ADD support back in")
+
+        if trace.level <= trace.DEBUG:
+            trace.debug(
+                "fixed_support",
+                node=n,
+                supports=num_supports,
+                safe=num_supports >= 2,
+                e_removed=e_K,
+                e_added_back=e_added_back,
+            )
 
         # distinguish between 2-support and 1-support
         if num_supports < 2:
-            print("-- DANGER, only {} SUPPORTS".format(num_supports))
             n_notsafe.append(n)
         else:
-            print("-- SAFE, w/ {} SUPPORTS".format(num_supports))
             if _count_fixed_sides(G, n)[0] == 2:
                 if flag:
                     n_safe_fix2.append(n)
@@ -200,49 +223,66 @@ def _check_connected(G, K, fxd_n_cut_rmv, fxd_n_check):
 ##############################################################################
 
 
-def calc_subg_single(G, rm_memb):
+def calc_subg_types(G, rm_memb):
     """
-    STEP A. Calculate a subgraph based on a single member set for removal.
+    STEP A, without side effects. Find the nodes of the removal subgraph and their types.
 
     Parameters:
     - G (networkx.MultiDiGraph): The original support hierarchy graph.
     - rm_memb: The member set for removal.
 
     Returns:
-    - networkx.MultiDiGraph: The calculated subgraph.
+    - tuple: List of checked nodes in visit order, and a dict of node -> node type.
 
     Steps:
     1. Initialize a queue with the member set for removal.
-    2. Initialize an empty set for checked nodes.
+    2. Initialize an empty list for checked nodes, and a set of checked + queued nodes.
     3. Loop through the queue and add adjacent nodes based on node types.
-    4. Build a subgraph from the checked nodes.
-    5. Set edge attributes for visualization.
-
     """
 
-    nodes_queue = [rm_memb]  # queue to check
+    nodes_queue = deque([rm_memb])  # queue to check
     nodes_checked = []  # saved list of checked nodes
+    nodes_seen = {rm_memb}  # checked + queued, for O(1) membership
+    node_types = {}
 
     # A. Loop through nodes queue, and see if their adjacents should be added
     while nodes_queue:
-        n_check = nodes_queue.pop(0)
+        n_check = nodes_queue.popleft()
+        nodes_seen.discard(n_check)  # neither queued nor checked while it is expanded
         node_type = _check_node_type(G, n_check, rm_memb)
 
         if node_type in ["remove", "normal", "normal_1side_fixed"]:
-            nodes_queue, nodes_checked = _find_adjacent_nodes(
-                G, n_check, nodes_queue, nodes_checked
-            )
+            nodes_queue, nodes_seen = _find_adjacent_nodes(G, n_check, nodes_queue, nodes_seen)
 
         nodes_checked.append(n_check)
-        node_draw_settings(G, [n_check], node_type)
+        nodes_seen.add(n_check)
+        node_types[n_check] = node_type
+
+    trace.info("subgraph", rm_memb=rm_memb, nodes=nodes_checked)
 
-        print("current n_queue: ", nodes_queue)
-        print("current n_checked: ", nodes_checked)
+    return nodes_checked, node_types
 
-    print("\nNODES IN FINAL SUBGRAPH:", nodes_checked)
 
-    K = G.subgraph(nodes_checked)  # sub-graph built from checked nodes
-    nx.set_edge_attributes(K, "black", "color")
+def calc_subg_single(G, rm_memb):
+    """
+    STEP A. Calculate a subgraph based on a single member set for removal.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The original support hierarchy graph, not modified.
+    - rm_memb: The member set for removal.
+
+    Returns:
+    - networkx.MultiDiGraph: The calculated subgraph, an overlay view of G.
+
+    Steps:
+    1. Find the checked nodes and their types (calc_subg_types).
+    2. Build an overlay view of G from the checked nodes.
+    3. Set node and edge attributes for visualization on the view.
+
+    """
+    nodes_checked, node_types = calc_subg_types(G, rm_memb)
+
+    K = overlay_view(G, nodes_checked, node_types)  # sub-graph built from checked nodes
     K.graph["title"] = rm_memb
 
     return K
@@ -267,59 +307,74 @@ def calc_subg_multi(Ks):
     return K_composed
 
 
-def check_fixed_nodes_cut(G, K):
+def calc_fixed_nodes_cut(G, K):
     """
-    STEP B. Identify nodes in a subgraph that are fully removed and have fixed connections.
-    For such nodes, mark the fixed connections as cut and return the nodes that are fully removed.
+    STEP B, without side effects. Identify nodes in a subgraph that are fully removed and have
+    fixed connections, and the fixed connections that are cut.
 
     Parameters:
     - G (networkx.Graph): The original graph.
     - K (networkx.Graph): The subgraph to analyze.
 
     Returns:
-    - list: Nodes in the subgraph that have fixed connections cut and are fully removed.
+    - tuple: List of nodes that have fixed connections cut and are fully removed, and a set
+      of the cut edges.
 
     Steps:
     1. Check if a member in the subgraph is fully removed by comparing in and out degrees.
     2. For fully removed members, identify fixed connections (edges with the same node in both in-edges and out-edges).
-    3. Mark these fixed connections as cut and add the nodes to the result sets.
+    3. Add these fixed connections to the cut edges and the nodes to the result sets.
     4. Return the nodes that are partially or fully removed with fixed connections cut
 
     """
 
-    print("\n\n2B. CHECK WHAT FIXED EDGES NEED TO BE CUT")
-
     fxd_n_cut = set()
     fxd_n_cut_rmv = set()
+    e_cut = set()
 
     for n in K.nodes():
-        print("\nchecking node {}".format(n))
-
         fully_removed = (K.in_degree(n) + K.out_degree(n)) == (G.in_degree(n) + G.out_degree(n))
 
         if fully_removed:
-            print("-- fully removed member")
-
             in_edges = set(K.in_edges(n))
             out_edges = set(K.out_edges(n))
 
             fixed_edges = in_edges.intersection([(v, u) for u, v in out_edges])
 
             if fixed_edges:
-                print("-- fixed member")
+                trace.debug("fixed_cut", node=n, e_cut=fixed_edges)
                 fxd_n_cut.update(u for u, v in fixed_edges)  # other n is just cut, check it
                 fxd_n_cut_rmv.update([n])  # fully remove the current node
-                edge_draw_settings(K, fixed_edges, "cut")
+                e_cut.update(fixed_edges)
 
-    print("\nfixed nodes that are cut but not removed: {}".format(fxd_n_cut))
-    print("fixed nodes that are cut and fully removed: {}".format(fxd_n_cut_rmv))
+    trace.info("fixed_nodes_cut", fxd_n_cut=fxd_n_cut, fxd_n_cut_rmv=fxd_n_cut_rmv)
 
-    return list(fxd_n_cut_rmv)
+    return list(fxd_n_cut_rmv), e_cut
 
 
-def check_fixed_nodes_support(G, K, rm_membs, fxd_n_cut_rmv):
+def check_fixed_nodes_cut(G, K):
     """
-    STEP C: Check the support conditions for fixed nodes.
+    STEP B. Identify nodes in a subgraph that are fully removed and have fixed connections.
+    For such nodes, mark the fixed connections as cut and return the nodes that are fully removed.
+
+    Parameters:
+    - G (networkx.Graph): The original graph.
+    - K (networkx.Graph): The subgraph to analyze, cut edges are styled on it.
+
+    Returns:
+    - list: Nodes in the subgraph that have fixed connections cut and are fully removed.
+
+    """
+    fxd_n_cut_rmv, e_cut = calc_fixed_nodes_cut(G, K)
+
+    edge_draw_settings(K, e_cut, "cut")
+
+    return fxd_n_cut_rmv
+
+
+def calc_fixed_nodes_support(G, K, rm_membs, fxd_n_cut_rmv):
+    """
+    STEP C, without side effects. Check the support conditions for fixed nodes.
 
     Parameters:
     - G (networkx.Graph): The overall graph.
@@ -327,9 +382,10 @@ def check_fixed_nodes_support(G, K, rm_membs, fxd_n_cut_rmv):
     - rm_membs (list): List of nodes to be removed.
     - fxd_n_cut_rmv (list): List of fully removed fixed nodes.
 
-    """
-    print("\n\n2C. CHECK FIXED NODES SUPPORTS")
+    Returns:
+    - dict: Node -> new node type, for the nodes relabeled by the support check.
 
+    """
     n_1side_fxd = []
     n_2side_fxd = []
 
@@ -343,17 +399,49 @@ def check_fixed_nodes_support(G, K, rm_membs, fxd_n_cut_rmv):
 
     fxd_n_check = n_1side_fxd + n_2side_fxd
 
-    print("\n-- NODES fully removed fixed: {}".format(fxd_n_cut_rmv))
-    print("-- NODES to check, 1-side + 2-side fixed: {} {}".format(n_1side_fxd, n_2side_fxd))
+    trace.info(
+        "fixed_nodes_check",
+        fxd_n_cut_rmv=fxd_n_cut_rmv,
+        n_1side_fxd=n_1side_fxd,
+        n_2side_fxd=n_2side_fxd,
+    )
 
     # check that properly supported
     n_safe_fix1, n_safe_fix2, n_notsafe = _check_connected(G, K, fxd_n_cut_rmv, fxd_n_check)
 
-    node_draw_settings(K, n_safe_fix1, "end_1sides_fixed")
-    node_draw_settings(K, n_safe_fix2, "end_2sides_fixed")
-    node_draw_settings(K, n_notsafe, "danger_1side_fixed")
-    node_draw_settings(K, fxd_n_cut_rmv, "normal_1side_fixed")
-    node_draw_settings(K, rm_membs, "remove")
+    if not isinstance(rm_membs, list):
+        rm_membs = [rm_membs]
+
+    # later labels take precedence
+    node_types = {}
+    for nodes, node_type in [
+        (n_safe_fix1, "end_1sides_fixed"),
+        (n_safe_fix2, "end_2sides_fixed"),
+        (n_notsafe, "danger_1side_fixed"),
+        (fxd_n_cut_rmv, "normal_1side_fixed"),
+        (rm_membs, "remove"),
+    ]:
+        for n in nodes:
+            node_types[n] = node_type
+
+    return node_types
+
+
+def check_fixed_nodes_support(G, K, rm_membs, fxd_n_cut_rmv):
+    """
+    STEP C: Check the support conditions for fixed nodes, and label them on K.
+
+    Parameters:
+    - G (networkx.Graph): The overall graph.
+    - K (networkx.Graph): The subgraph for member removal.
+    - rm_membs (list): List of nodes to be removed.
+    - fxd_n_cut_rmv (list): List of fully removed fixed nodes.
+
+    """
+    node_types = calc_fixed_nodes_support(G, K, rm_membs, fxd_n_cut_rmv)
+
+    for n, node_type in node_types.items():
+        node_draw_settings(K, n, node_type)
 
 
 if __name__ == "__main__":
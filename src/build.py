@@ -1,12 +1,17 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import networkx as nx
 
-from src.drawing import node_draw_settings
+from src.views import overlay_view
 
 from src.algorithms import (
     calc_subg_multi,
+    calc_subg_types,
+    calc_fixed_nodes_cut,
+    calc_fixed_nodes_support,
     check_fixed_nodes_support,
     check_fixed_nodes_cut,
-    calc_subg_single,
 )
 
 from src.algo_sequence import (
@@ -18,9 +23,19 @@ from src.algo_sequence import (
     new_subg_relabel,
 )
 
+from src import trace
+from src.cache import graph_fingerprint
+
+from src.compact import CompactGraph, calc_removal_table
+
+from src.index import get_fixed_index, mark_changed
+from src.snapshots import SnapshotStore
+
 from src.io import (
     read_json,
     read_json_subgraph,
+    write_json_sequence,
+    write_table,
 )
 
 
@@ -59,7 +74,9 @@ def _add_in_extra_edge(G, K_joined):
     for n1, n2 in missing_edges:
         data = G.get_edge_data(n1, n2)
         K_joined.add_edges_from([(n1, n2, data[0])])
-        K_joined.edges[n1, n2, 0]["color"] = "black"
+        K_joined.edges[n1, n2, 0]["edge_type"] = "normal"
+
+    mark_changed(K_joined)  # edges were added
 
     print("\nmissing edges in joined subgraphs: {}".format(missing_edges))
 
@@ -70,15 +87,10 @@ def _create_subg(G, data, i):
 
     subset_nodes = list(data_nodes)
 
-    K = G.subgraph(subset_nodes)
+    K = overlay_view(G, subset_nodes, data_nodes)
     K.graph["step"] = i
     K.graph["title"] = "Step {}: {}".format(i, data_title)
 
-    for key, value in data_nodes.items():
-        node_draw_settings(K, [key], value)
-
-    nx.set_edge_attributes(K, "black", "color")
-
     return K
 
 
@@ -99,7 +111,8 @@ def bld_g_full(folder_in):
     1. Initialize an empty directed multigraph.
     2. Read edge and node data from specified JSON files.
     3. Add nodes and edges to the graph.
-    4. Return the constructed support hierarchy graph.
+    4. Index the fixed connections once, for the analysis steps.
+    5. Return the constructed support hierarchy graph.
     """
     print("\n\n##1. BUILD FULL SUPPORT HIERARCHY GRAPH##")
 
@@ -118,6 +131,8 @@ def bld_g_full(folder_in):
         _add_nodes(G, node_data)
         _add_edges(G, edge_data)
 
+    get_fixed_index(G)
+
     return G
 
 
@@ -131,55 +146,156 @@ def bld_g_sub(G, folder_in, steps):
     Ks = []
 
     for i in range(steps + 1):
-        K = _create_subg(G.copy(), data, i)
+        K = _create_subg(G, data, i)
 
         Ks.append(K)
 
     return Ks
 
 
-def bld_subg_single_remove(G, rm_membs):
+def _subg_single_remove(G, rm_memb):
+    """Analysis of a single member removal, as (nodes, node types, cut edges). G is not modified."""
+    trace.info("member_removal", rm_memb=rm_memb)
+
+    # Find the subgraph nodes for the current member removal
+    nodes, node_types = calc_subg_types(G, rm_memb)
+    K = G.subgraph(nodes)
+
+    # Check for fixed nodes that need to be cut in the subgraph
+    fxd_n_cut_rmv, e_cut = calc_fixed_nodes_cut(G, K)
+
+    # Perform additional analysis on fixed nodes and their support in the original graph
+    node_types.update(calc_fixed_nodes_support(G, K, rm_memb, fxd_n_cut_rmv))
+
+    return nodes, node_types, e_cut
+
+
+# base graph of a worker process, sent once when the worker starts
+_WORKER_G = None
+
+
+def _init_worker(G):
+    global _WORKER_G
+    _WORKER_G = G
+
+
+def _subg_single_remove_worker(rm_memb):
+    return _subg_single_remove(_WORKER_G, rm_memb)
+
+
+def _subg_single_remove_many(G, rm_membs, n_workers):
+    if n_workers == 1:
+        return [_subg_single_remove(G, rm_memb) for rm_memb in rm_membs]
+
+    n_workers = n_workers or os.cpu_count()
+    chunksize = max(1, len(rm_membs) // (4 * n_workers))
+
+    with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(G,)) as pool:
+        return list(pool.map(_subg_single_remove_worker, rm_membs, chunksize=chunksize))
+
+
+def bld_subg_single_results(G, rm_membs, n_workers=1, cache=None):
+    """
+    Analysis results for individual member removals, without building subgraphs.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The original support hierarchy graph.
+    - rm_membs (list): List of members to be individually removed.
+    - n_workers (int, optional): Number of worker processes. 1 runs in this process,
+      None uses all cores.
+    - cache (RemovalCache, optional): Cache of removal results, keyed by the content of G.
+
+    Returns:
+    - list: (nodes, node types, cut edges) for each member, in the order of rm_membs.
+
+    With several workers, each worker receives G once at start-up, members are handed
+    out in chunks, and only the results come back.
+    """
+    results = {}
+
+    if cache is not None:
+        fingerprint = graph_fingerprint(G)
+        for rm_memb in rm_membs:
+            result = cache.get(fingerprint, rm_memb)
+            if result is not None:
+                results[rm_memb] = result
+
+    rm_membs_calc = [m for m in dict.fromkeys(rm_membs) if m not in results]
+    results.update(zip(rm_membs_calc, _subg_single_remove_many(G, rm_membs_calc, n_workers)))
+
+    if cache is not None:
+        for rm_memb in rm_membs_calc:
+            cache.put(fingerprint, rm_memb, results[rm_memb])
+
+    return [results[rm_memb] for rm_memb in rm_membs]
+
+
+def bld_subg_single_remove(G, rm_membs, n_workers=1, cache=None):
     """
     Build subgraphs for individual member removals and perform analysis.
 
     Parameters:
     - G (networkx.MultiDiGraph): The original support hierarchy graph.
     - rm_membs (list): List of members to be individually removed.
+    - n_workers (int, optional): Number of worker processes. 1 runs in this process,
+      None uses all cores.
+    - cache (RemovalCache, optional): Cache of removal results, keyed by the content of G.
 
     Returns:
-    - list: List of subgraphs corresponding to each member removal.
+    - list: List of subgraphs (overlay views of G) for each member removal, in the order of rm_membs.
 
     Steps:
-    1. Initialize an empty list to store subgraphs.
-    2. For each member in the list to be removed:
-    3. Build a subgraph corresponding to the member removal.
+    1. Look up cached results, if a cache is given.
+    2. For each other member to be removed:
+    3. Find the subgraph nodes and node types corresponding to the member removal.
     4. Check for fixed nodes that need to be cut in the subgraph.
     5. Perform additional analysis on fixed nodes and their support in the original graph.
-    6. Append the subgraph to the list.
+    6. Build a subgraph view of G with the results, for each member.
     7. Return the list of subgraphs.
-
     """
+    results = bld_subg_single_results(G, rm_membs, n_workers, cache)
+
     Ks = []
 
-    for rm_memb in rm_membs:
-        print("\n\n##2. BUILD SUBGRAPH FOR MEMBER REMOVAL: {}##".format(rm_memb))
+    for rm_memb, (nodes, node_types, e_cut) in zip(rm_membs, results):
+        K = overlay_view(G, nodes, node_types, e_cut)
+        K.graph["title"] = rm_memb
 
-        # Build a subgraph for the current member removal
-        K = calc_subg_single(G.copy(), rm_memb)
+        Ks.append(K)
 
-        # Check for fixed nodes that need to be cut in the subgraph
-        fxd_n_cut_rmv = check_fixed_nodes_cut(G, K)
+    return Ks
 
-        # Perform additional analysis on fixed nodes and their support in the original graph
-        check_fixed_nodes_support(G, K, rm_memb, fxd_n_cut_rmv)
 
-        # Append the subgraph to the list
-        Ks.append(K)
+def bld_removal_table(G, rm_membs=None, folder_out=None, name="_removal_table.csv"):
+    """
+    Removal impact of every member, computed in one batched pass on a CompactGraph.
 
-    return Ks
+    Parameters:
+    - G (networkx.MultiDiGraph): The original support hierarchy graph.
+    - rm_membs (list, optional): Members to analyse. Defaults to all members of G.
+    - folder_out (str, optional): If given, write the table to this folder.
+    - name (str): Output file name, .csv or .json.
 
+    Returns:
+    - list: One row per member: subgraph size, fully removed fixed nodes and unsafe nodes.
 
-def bld_subg_multi_remove(G, Ks, rm_membs):
+    Steps:
+    1. Pack G into a CompactGraph (integer ids, CSR adjacency, fixed edge bitmask).
+    2. Share the expansion through "normal" nodes between all members.
+    3. Per member, check fixed nodes cut and fixed node supports, as in bld_subg_single_remove.
+    4. Write the table if an output folder is given.
+    """
+    print("\n\n##2. BUILD REMOVAL TABLE FOR {} MEMBERS##".format(len(rm_membs or G)))
+
+    rows = calc_removal_table(CompactGraph(G), rm_membs)
+
+    if folder_out:
+        write_table(folder_out, name, rows)
+
+    return rows
+
+
+def bld_subg_multi_remove(G, Ks, rm_membs, joined=None):
     """
     Build a subgraph for multiple members removal and perform analysis.
 
@@ -187,6 +303,9 @@ def bld_subg_multi_remove(G, Ks, rm_membs):
     - G (networkx.MultiDiGraph): The original support hierarchy graph.
     - Ks (list): List of subgraphs corresponding to individual member removals.
     - rm_membs (list): List of members to be removed.
+    - joined (JoinedRemoval, optional): Joined subgraph of earlier calls, updated for the
+      members that changed instead of rebuilt from Ks. Its `K` is returned, and changes
+      with later updates.
 
     Returns:
     - networkx.MultiDiGraph: A subgraph representing the removal of multiple members.
@@ -200,6 +319,12 @@ def bld_subg_multi_remove(G, Ks, rm_membs):
     """
     print("\n\n##3. BUILD SUBGRAPH FOR MULTIPLE MEMBERS REMOVAL##")
 
+    if joined is not None:
+        joined.set_members(rm_membs)
+        print("\nmissing edges in joined subgraphs: {}".format(joined.missing_edges))
+
+        return joined.K
+
     # Compose all individual subgraphs into a single subgraph
     K_joined = calc_subg_multi(Ks)
 
@@ -215,17 +340,26 @@ def bld_subg_multi_remove(G, Ks, rm_membs):
     return K_joined
 
 
-def bld_sequence(K, rm_membs):
+def bld_sequence(K, rm_membs, planner=None, script=None, folder_out=None, name="_session.json"):
     """
     Phase 1 and 2. Builds a disassembly sequence based on the provided graph and removal members.
 
     Parameters:
     - K (networkx.Graph): The input graph representing the assembly structure.
     - rm_membs (list): A list of nodes to be as active member targets.
+    - planner (Planner, optional): Chooses the removals and supports of each step instead of
+      asking with `input()`. The sequence ends when the plan is done.
+    - script (list, optional): Decisions to replay, one dict per step with "rob_support",
+      "remove" and "support" lists (see read_json_sequence). Runs without `input()` and ends
+      when the script is done.
+    - folder_out (str, optional): Folder to record an interactive session to, replayable as
+      a script. Sessions driven by a planner or a script are not recorded.
+    - name (str): File name of the recorded session. An interrupted session is written to
+      "<name>_interrupted" instead (see write_json_sequence), the last whole one is kept.
 
     Returns:
-    - tuple: A tuple containing two lists: `saved_K` - a list of saved graph states during the disassembly process,
-      and `saved_seq` - a list representing the disassembly sequence.
+    - tuple: A tuple containing two lists: `saved_K` - a SnapshotStore of saved graph states during the disassembly process,
+      indexed and iterated like a list of graphs, and `saved_seq` - a list representing the disassembly sequence.
 
     The function iteratively selects nodes to remove from the graph `K` based on the provided `rm_membs`
     and updates the disassembly sequence accordingly. It terminates when no more removal members can be
@@ -244,8 +378,35 @@ def bld_sequence(K, rm_membs):
     """
     print("\nCALCULATING DISASSEMBLY SEQUENCE")
 
+    if planner is not None and script is not None:
+        raise ValueError("bld_sequence takes a planner or a script, not both")
+
     K_reduced = K.copy()
-    saved_K, saved_seq = [], []
+    saved_K, saved_seq = SnapshotStore(), []
+
+    # only interactive sessions are recorded, a replay must not overwrite its script
+    record = folder_out and planner is None and script is None
+
+    if planner is not None:
+        script = planner.plan(K_reduced, rm_membs)
+
+    decisions = iter(script) if script is not None else None
+    session = []
+    session_membs = list(rm_membs)
+    complete = False
+
+    try:
+        _bld_sequence_steps(K_reduced, rm_membs, decisions, saved_K, saved_seq, session)
+        complete = True
+    finally:
+        # also keep the steps made so far if an interactive session is interrupted
+        if record:
+            write_json_sequence(folder_out, name, session_membs, session, complete)
+
+    return saved_K, saved_seq
+
+
+def _bld_sequence_steps(K_reduced, rm_membs, decisions, saved_K, saved_seq, session):
     step = 0
 
     while True:
@@ -255,15 +416,35 @@ def bld_sequence(K, rm_membs):
         # check if any start node in current subgraph
         n_active = find_n_active(K_reduced, n_type=["start", "robsupport_fixed"])
 
+        if decisions is None:
+            decision = {"rob_support": None, "remove": None, "support": None}
+        else:
+            decision = next(decisions, None)
+            if decision is None:
+                print("-Terminate: Plan finished")
+                break
+            decision = {k: decision.get(k, []) for k in ["rob_support", "remove", "support"]}
+
         # user set any new rob supports at start
-        n_new_robsupport = set_rob_support(K_reduced)
+        n_new_robsupport = set_rob_support(K_reduced, decision["rob_support"])
 
         if not set(n_active).union(set(n_new_robsupport)):
             print("-Terminate: No more removal members")
             break
 
         # user select a subset for remove and rob support
-        n_rmv_step, n_robfxd_step = select_n_active(K_reduced, n_active, n_new_robsupport)
+        n_rmv_step, n_robfxd_step = select_n_active(
+            K_reduced, n_active, n_new_robsupport, decision["remove"], decision["support"]
+        )
+
+        session.append(
+            {
+                "step": step,
+                "rob_support": n_new_robsupport,
+                "remove": n_rmv_step,
+                "support": [n for n in n_robfxd_step if n not in n_new_robsupport],
+            }
+        )
 
         # save the current state
         crnt_subg_save(K_reduced, step, n_rmv_step, n_robfxd_step, saved_K, saved_seq)
@@ -278,5 +459,3 @@ def bld_sequence(K, rm_membs):
         # print output
         print("\n-remaining nodes are {}".format(K_reduced.nodes()))
         print("-sequence so far is {}".format(saved_seq))
-
-    return saved_K, saved_seq
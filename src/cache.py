@@ -0,0 +1,174 @@
+import hashlib
+import json
+import pathlib
+from collections import OrderedDict
+
+
+def graph_fingerprint(G):
+    """
+    Content fingerprint of a graph's structure: its nodes and edges (with multiplicity).
+
+    Removal results only depend on the structure. Node and edge attributes (types,
+    positions) are read from the live graph when a cached result is turned into a view.
+
+    Parameters:
+    - G (networkx.Graph): The graph.
+
+    Returns:
+    - str: Hex digest.
+    """
+    data = [sorted(map(str, G.nodes())), sorted(map(str, G.edges()))]
+
+    return hashlib.sha1(json.dumps(data).encode()).hexdigest()
+
+
+class RemovalCache:
+    """
+    LRU cache of single member removal results, keyed by graph fingerprint and member.
+
+    A result is the tuple (nodes, node_types, e_cut) of `build._subg_single_remove`. A new
+    fingerprint (e.g. after editing the input JSON) never matches old entries, so stale
+    results are not returned.
+
+    Parameters:
+    - maxsize (int): Maximum number of results kept in memory.
+    - folder (str, optional): Directory to persist results to, read back on a memory miss.
+    """
+
+    def __init__(self, maxsize=256, folder=None):
+        self.maxsize = maxsize
+        self.folder = pathlib.Path(folder) if folder else None
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.folder:
+            self.folder.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _path(self, key):
+        name = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return self.folder / "{}.json".format(name)
+
+    def _read(self, key):
+        p = self._path(key)
+        if not p.exists():
+            return None
+
+        with open(p, "r") as infile:
+            data = json.load(infile)
+
+        return data["nodes"], data["node_types"], {tuple(e) for e in data["e_cut"]}
+
+    def _write(self, key, result):
+        nodes, node_types, e_cut = result
+        data = {"nodes": nodes, "node_types": node_types, "e_cut": sorted(e_cut)}
+
+        with open(self._path(key), "w") as outfile:
+            json.dump(data, outfile)
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, fingerprint, rm_memb):
+        key = (fingerprint, rm_memb)
+
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+        if self.folder:
+            result = self._read(key)
+            if result is not None:
+                self._store(key, result)
+                self.disk_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, fingerprint, rm_memb, result):
+        key = (fingerprint, rm_memb)
+        self._store(key, result)
+
+        if self.folder:
+            self._write(key, result)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+class FigureCache:
+    """
+    Skip saving figures that would not change, by a fingerprint of their content saved
+    next to each figure ("<figure>.fingerprint", with the seconds it took to save).
+
+    A figure is skipped when it exists and its fingerprint matches. The stats report the
+    figures saved and skipped, and the time skipping saved, from the recorded seconds.
+    """
+
+    def __init__(self):
+        self.saved = 0
+        self.skipped = 0
+        self.time_saved = 0.0
+
+    @staticmethod
+    def _paths(filepath):
+        p = pathlib.Path(filepath)
+        if not p.suffix:
+            p = p.with_name(p.name + ".png")  # added by savefig
+
+        return p, p.with_name(p.name + ".fingerprint")
+
+    def fresh(self, filepath, fingerprint):
+        """True if the figure at filepath was saved with this fingerprint."""
+        p, p_fp = self._paths(filepath)
+        if not p.exists() or not p_fp.exists():
+            return False
+
+        with open(p_fp, "r") as infile:
+            data = json.load(infile)
+
+        if data["fingerprint"] != fingerprint:
+            return False
+
+        self.skipped += 1
+        self.time_saved += data["time"]
+
+        return True
+
+    def put(self, filepath, fingerprint, seconds):
+        """Record a saved figure."""
+        _, p_fp = self._paths(filepath)
+
+        with open(p_fp, "w") as outfile:
+            json.dump({"fingerprint": fingerprint, "time": seconds}, outfile)
+
+        self.saved += 1
+
+    def stats(self):
+        return {"saved": self.saved, "skipped": self.skipped, "time_saved": self.time_saved}
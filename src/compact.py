@@ -0,0 +1,447 @@
+import numpy as np
+
+
+def _to_csr(adjacency):
+    """
+    Pack a list of neighbor lists into CSR (compressed sparse row) arrays.
+
+    Parameters:
+    - adjacency (list): List of neighbor id lists, one per node.
+
+    Returns:
+    - tuple: Row pointer array and column index array.
+    """
+    ptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(a) for a in adjacency])
+
+    idx = np.fromiter((j for a in adjacency for j in a), dtype=np.int32, count=int(ptr[-1]))
+
+    return ptr, idx
+
+
+class CompactGraph:
+    """
+    Read-only, array-backed copy of a support hierarchy graph for analysis.
+
+    Member names are interned to integer ids (position in `names`). Successors and
+    predecessors are stored as CSR arrays, with one entry per edge so degrees match the
+    MultiDiGraph. `succ_fixed` is a bitmask over the successor entries marking edges that
+    also exist in the reverse direction (a "fixed" connection).
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The support hierarchy graph to pack.
+    """
+
+    def __init__(self, G):
+        self.names = list(G.nodes())
+        self.index = {n: i for i, n in enumerate(self.names)}
+
+        succ = [[] for _ in self.names]
+        pred = [[] for _ in self.names]
+        for u, v in G.edges():
+            succ[self.index[u]].append(self.index[v])
+            pred[self.index[v]].append(self.index[u])
+
+        self.succ_ptr, self.succ_idx = _to_csr(succ)
+        self.pred_ptr, self.pred_idx = _to_csr(pred)
+
+        succ_sets = [set(s) for s in succ]
+        self.succ_fixed = np.fromiter(
+            (i in succ_sets[j] for i, s in enumerate(succ) for j in s),
+            dtype=bool,
+            count=len(self.succ_idx),
+        )
+
+        self.in_deg = np.diff(self.pred_ptr).astype(np.int32)
+        self.out_deg = np.diff(self.succ_ptr).astype(np.int32)
+        self.fixed_count = np.fromiter(
+            (len({j for j in s if i in succ_sets[j]}) for i, s in enumerate(succ)),
+            dtype=np.int32,
+            count=len(succ),
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def ids(self, nodes):
+        """Map member names to integer ids."""
+        return [self.index[n] for n in nodes]
+
+    def successors(self, i):
+        return self.succ_idx[self.succ_ptr[i] : self.succ_ptr[i + 1]].tolist()
+
+    def predecessors(self, i):
+        return self.pred_idx[self.pred_ptr[i] : self.pred_ptr[i + 1]].tolist()
+
+    def fixed_partners(self, i):
+        """Ids connected to node i in both directions."""
+        lo, hi = self.succ_ptr[i], self.succ_ptr[i + 1]
+        return set(self.succ_idx[lo:hi][self.succ_fixed[lo:hi]].tolist())
+
+    def has_edge(self, i, j):
+        return j in self.successors(i)
+
+    def is_fixed(self, i, j):
+        return j in self.fixed_partners(i)
+
+
+##############################################################################
+
+
+def _check_node_type(C, i, rm_ids):
+    """
+    Compact version of `algorithms._check_node_type`, on integer ids.
+
+    Parameters:
+    - C (CompactGraph): The packed graph.
+    - i (int): The node to be evaluated.
+    - rm_ids (set): Ids of the nodes to be removed.
+
+    Returns:
+    - str: The node type, same labels as the networkx path.
+    """
+    in_degree = C.in_deg[i]
+    fixed_sides_count = C.fixed_count[i]
+
+    if i in rm_ids and in_degree == 0:
+        node_type = "remove_start"
+    elif i in rm_ids:
+        node_type = "remove"
+    elif in_degree == 0:
+        node_type = "start"
+    elif C.out_deg[i] == 0:
+        node_type = "end_foundation"
+    elif fixed_sides_count == 2:
+        node_type = "end_2sides_fixed"
+    elif fixed_sides_count == 1:
+        if not C.fixed_partners(i).isdisjoint(rm_ids):
+            node_type = "danger_1side_fixed"
+        elif rm_ids.isdisjoint(C.successors(i)):
+            node_type = "danger_1side_fixed"
+        else:
+            node_type = "normal_1side_fixed"
+    else:
+        node_type = "normal"
+
+    return node_type
+
+
+def _rm_ids(C, rm_membs):
+    if not isinstance(rm_membs, list):
+        rm_membs = [rm_membs]
+
+    return set(C.ids(rm_membs))
+
+
+def _fixed_nodes_cut(C, k_ids):
+    """Ids of fully removed fixed nodes in k_ids, and their fixed partners."""
+    fxd_n_cut_rmv = {}
+
+    for i in k_ids:
+        if not C.fixed_count[i]:
+            continue
+
+        fully_removed = k_ids.issuperset(C.successors(i)) and k_ids.issuperset(C.predecessors(i))
+
+        if fully_removed:
+            fxd_n_cut_rmv[i] = C.fixed_partners(i)
+
+    return fxd_n_cut_rmv
+
+
+def _fixed_nodes_support(C, k_ids, cut_rmv_ids, node_types):
+    """Ids of safe 1-side, safe 2-side and not safe fixed nodes in k_ids."""
+    n_safe_fix1, n_safe_fix2, n_notsafe = [], [], []
+
+    for i in k_ids:
+        if node_types[i] not in ["end_2sides_fixed", "danger_1side_fixed"]:
+            continue
+
+        # supports in K are being removed, unless they are fixed and the fixed edge is not cut
+        e_K = [j for j in C.successors(i) if j in k_ids]
+        num_supports = C.out_deg[i] - len(e_K)
+
+        flag = False
+        if i not in cut_rmv_ids:
+            fixed = C.fixed_partners(i)
+            for j in e_K:
+                if j in fixed and j not in cut_rmv_ids:
+                    flag = True
+                    num_supports += 1
+
+        if num_supports < 2:
+            n_notsafe.append(i)
+        elif C.fixed_count[i] == 2:
+            (n_safe_fix2 if flag else n_safe_fix1).append(i)
+        elif C.fixed_count[i] == 1:
+            n_safe_fix1.append(i)
+
+    return n_safe_fix1, n_safe_fix2, n_notsafe
+
+
+def _support_relabel(C, k_ids, rm_ids, cut_rmv_ids, node_types):
+    """Node types set by STEP C, in the order they are applied."""
+    n_safe_fix1, n_safe_fix2, n_notsafe = _fixed_nodes_support(C, k_ids, cut_rmv_ids, node_types)
+
+    relabel = {}
+    for ids, node_type in [
+        (n_safe_fix1, "end_1sides_fixed"),
+        (n_safe_fix2, "end_2sides_fixed"),
+        (n_notsafe, "danger_1side_fixed"),
+        (cut_rmv_ids, "normal_1side_fixed"),
+        (rm_ids, "remove"),
+    ]:
+        for i in ids:
+            relabel[i] = node_type
+
+    return relabel
+
+
+def calc_subg_single(C, rm_memb):
+    """
+    STEP A on a CompactGraph. Same members and node types as `algorithms.calc_subg_single`,
+    without building a networkx subgraph. The members are not in the same order.
+
+    Parameters:
+    - C (CompactGraph): The packed support hierarchy graph.
+    - rm_memb: The member for removal.
+
+    Returns:
+    - tuple: List of subgraph member names, in an unspecified order, and a dict of
+      name -> node type.
+    """
+    rm_ids = _rm_ids(C, rm_memb)
+    start = C.index[rm_memb]
+
+    nodes_queue = [start]
+    nodes_seen = {start}
+    node_types = {}
+
+    for i in nodes_queue:
+        node_type = _check_node_type(C, i, rm_ids)
+        node_types[i] = node_type
+
+        if node_type in ["remove", "normal", "normal_1side_fixed"]:
+            for j in C.successors(i) + C.predecessors(i):
+                if j not in nodes_seen:
+                    nodes_seen.add(j)
+                    nodes_queue.append(j)
+
+    nodes = [C.names[i] for i in nodes_queue]
+    return nodes, {C.names[i]: t for i, t in node_types.items()}
+
+
+def check_fixed_nodes_cut(C, K):
+    """
+    STEP B on a CompactGraph. Identify fully removed nodes that have fixed connections.
+
+    Parameters:
+    - C (CompactGraph): The packed support hierarchy graph.
+    - K (iterable): Member names in the subgraph (a networkx subgraph also works).
+
+    Returns:
+    - tuple: List of fully removed fixed nodes, and a set of cut edges (both directions).
+    """
+    k_ids = set(C.ids(K))
+
+    fxd_n_cut_rmv = _fixed_nodes_cut(C, k_ids)
+
+    e_cut = set()
+    for i, partners in fxd_n_cut_rmv.items():
+        for j in partners:
+            e_cut.update([(C.names[i], C.names[j]), (C.names[j], C.names[i])])
+
+    return [C.names[i] for i in fxd_n_cut_rmv], e_cut
+
+
+def check_fixed_nodes_support(C, K, rm_membs, fxd_n_cut_rmv):
+    """
+    STEP C on a CompactGraph. Check the support conditions for fixed nodes.
+
+    Parameters:
+    - C (CompactGraph): The packed support hierarchy graph.
+    - K (iterable): Member names in the subgraph (a networkx subgraph also works).
+    - rm_membs: A single member or a list of members to be removed.
+    - fxd_n_cut_rmv (list): List of fully removed fixed nodes.
+
+    Returns:
+    - dict: Member name -> node type, for the nodes relabeled in this step. Apply in order.
+    """
+    rm_ids = _rm_ids(C, rm_membs)
+    k_ids = set(C.ids(K))
+    node_types = {i: _check_node_type(C, i, rm_ids) for i in k_ids}
+
+    relabel = _support_relabel(C, k_ids, rm_ids, set(C.ids(fxd_n_cut_rmv)), node_types)
+
+    return {C.names[i]: t for i, t in relabel.items()}
+
+
+##############################################################################
+
+
+class _Unpacked:
+    """
+    Python list copies of a CompactGraph's adjacency and degrees, with the same lookup
+    methods. Used by batch runs that query every node many times.
+    """
+
+    def __init__(self, C):
+        self.names = C.names
+        self.index = C.index
+        self.in_deg = C.in_deg.tolist()
+        self.out_deg = C.out_deg.tolist()
+        self.fixed_count = C.fixed_count.tolist()
+
+        self._succ = [C.successors(i) for i in range(len(C))]
+        self._pred = [C.predecessors(i) for i in range(len(C))]
+        self._fixed = [C.fixed_partners(i) for i in range(len(C))]
+
+    def __len__(self):
+        return len(self.names)
+
+    def ids(self, nodes):
+        return [self.index[n] for n in nodes]
+
+    def successors(self, i):
+        return self._succ[i]
+
+    def predecessors(self, i):
+        return self._pred[i]
+
+    def fixed_partners(self, i):
+        return self._fixed[i]
+
+
+class RemovalTable:
+    """
+    Single-member removal analysis for many members of one CompactGraph.
+
+    Traversal work is shared between members. Outside of the removal member and its
+    neighbors, node types do not depend on the member, so the BFS of `calc_subg_single`
+    only ever expands through connected groups of "normal" nodes. These groups and their
+    neighborhoods (closures) are computed once, and each member's subgraph is the union
+    of its own neighborhood and the closures it touches.
+
+    Parameters:
+    - C (CompactGraph): The packed support hierarchy graph.
+    """
+
+    def __init__(self, C):
+        C = _Unpacked(C)
+
+        self.C = C
+        self.base_types = [_check_node_type(C, i, set()) for i in range(len(C))]
+
+        # union-find over "normal" nodes joined by an edge in either direction
+        parent = list(range(len(C)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        normal = [t == "normal" for t in self.base_types]
+        for i in range(len(C)):
+            if normal[i]:
+                for j in C.successors(i):
+                    if normal[j]:
+                        parent[find(i)] = find(j)
+
+        self.comp = [find(i) if normal[i] else -1 for i in range(len(C))]
+
+        closures = {}
+        for i in range(len(C)):
+            if normal[i]:
+                closure = closures.setdefault(self.comp[i], set())
+                closure.add(i)
+                closure.update(C.successors(i))
+                closure.update(C.predecessors(i))
+
+        self.closures = closures
+
+    def _adjacent(self, i):
+        return self.C.successors(i) + self.C.predecessors(i)
+
+    def subgraph(self, i):
+        """
+        Node ids and node types of the removal subgraph of member id i (STEP A).
+
+        Returns:
+        - tuple: Set of node ids, and a dict of id -> node type.
+        """
+        C = self.C
+        rm_ids = {i}
+
+        node_type = _check_node_type(C, i, rm_ids)
+        if node_type == "remove_start":
+            return {i}, {i: node_type}
+
+        # the removal member and its neighbors are typed against the member
+        node_types = {i: node_type}
+        for j in self._adjacent(i):
+            node_types[j] = _check_node_type(C, j, rm_ids)
+
+        k_ids = set(node_types)
+        for j, t in list(node_types.items()):
+            if t == "normal_1side_fixed":
+                k_ids.update(self._adjacent(j))
+
+        for j in list(k_ids):
+            if self.comp[j] >= 0 and node_types.get(j, "normal") == "normal":
+                k_ids |= self.closures[self.comp[j]]
+
+        for j in k_ids:
+            if j not in node_types:
+                node_types[j] = self.base_types[j]
+
+        return k_ids, node_types
+
+    def row(self, rm_memb):
+        """
+        Removal impact of a single member.
+
+        Parameters:
+        - rm_memb: The member for removal.
+
+        Returns:
+        - dict: Member, subgraph size, fully removed fixed nodes and unsafe (danger) nodes.
+        """
+        C = self.C
+        i = C.index[rm_memb]
+
+        k_ids, node_types = self.subgraph(i)
+        cut_rmv_ids = set(_fixed_nodes_cut(C, k_ids))
+        node_types.update(_support_relabel(C, k_ids, {i}, cut_rmv_ids, node_types))
+
+        return {
+            "member": rm_memb,
+            "subgraph_size": len(k_ids),
+            "fixed_cut_removed": sorted(C.names[j] for j in cut_rmv_ids),
+            "unsafe": sorted(
+                C.names[j] for j, t in node_types.items() if t == "danger_1side_fixed"
+            ),
+        }
+
+
+def calc_removal_table(C, rm_membs=None):
+    """
+    Removal impact of every member (or the given members) of a CompactGraph.
+
+    Parameters:
+    - C (CompactGraph): The packed support hierarchy graph.
+    - rm_membs (list, optional): Members to analyse. Defaults to all members.
+
+    Returns:
+    - list: One row dict per member, see `RemovalTable.row`.
+    """
+    if rm_membs is None:
+        rm_membs = C.names
+
+    table = RemovalTable(C)
+
+    return [table.row(m) for m in rm_membs]
+
+
+if __name__ == "__main__":
+    pass
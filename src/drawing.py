@@ -1,16 +1,67 @@
+import hashlib
+import json
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib as mpl
+from matplotlib import animation
+
+from src import trace
+from src.index import note_node_type
+from src.io import parse_pos
+
+# node positions of each graph object, by scale, dropped together with the graph
+_NODE_POS = weakref.WeakKeyDictionary()
+
+
+def node_positions(G, scale=1):
+    """
+    Drawing positions of the nodes of G that have a "pos" attribute, parsed once per graph
+    and scale. A graph that lost or gained nodes since is parsed again.
+
+    Parameters:
+    - G (networkx.Graph): The graph.
+    - scale (float): Scale of x, y is scaled twice as much.
+
+    Returns:
+    - tuple: (nodes, numpy array of their (x, y) positions).
+    """
+    by_scale = _NODE_POS.setdefault(G, {})
+    cached = by_scale.get(scale)
+
+    if cached is None or cached[0] != G.number_of_nodes():
+        nodes, xy = [], []
+        for n, pos in G.nodes(data="pos"):
+            if pos is not None:
+                nodes.append(n)
+                xy.append(parse_pos(pos)[:2])
+
+        xy = np.array(xy, dtype=float).reshape(-1, 2) * [scale, scale * 2]
+        cached = by_scale[scale] = (G.number_of_nodes(), nodes, xy)
+
+    return cached[1], cached[2]
 
 
 def _get_node_pos(G, scale=1):
-    scale = [scale, scale * 2]
+    nodes, xy = node_positions(G, scale)
 
-    pos_fixed = {}
-    for k, v in nx.get_node_attributes(G, "pos").items():
-        pos_fixed[k] = tuple(dim * s for dim, s in zip(eval(v), scale))
+    return dict(zip(nodes, xy))
 
-    return pos_fixed
+
+def _layout(G, pos_fixed, layout="direct"):
+    """
+    Node positions to draw G with. With every node fixed, spring_layout returns the fixed
+    positions: "direct" uses them without it, "spring" always runs it.
+    """
+    if layout == "direct" and len(pos_fixed) == len(G) > 1:
+        return pos_fixed
+
+    return nx.spring_layout(G, pos=pos_fixed, fixed=pos_fixed.keys())
 
 
 def move_figure(f, x, y):
@@ -26,77 +77,209 @@ def move_figure(f, x, y):
         f.canvas.manager.window.move(x, y)
 
 
+# drawing attributes of each node type, shared by all nodes: nodes only store their type
+NODE_STYLES = {
+    "remove": {"color": "tab:red", "size": 600, "node_shape": "8"},
+    "start": {"color": "tab:green", "size": 400, "node_shape": "o"},
+    "normal": {"color": "tab:grey", "size": 400, "node_shape": "o"},
+    "remove_start": {"color": "tab:red", "size": 600, "node_shape": "8"},
+    "end_foundation": {"color": "black", "size": 600, "node_shape": "8"},
+    "end_2sides_fixed": {"color": "black", "size": 600, "node_shape": "h"},
+    "end_1sides_fixed": {"color": "black", "size": 450, "node_shape": "s"},
+    "danger_1side_fixed": {"color": "tab:orange", "size": 450, "node_shape": "s"},
+    "normal_1side_fixed": {"color": "tab:grey", "size": 400, "node_shape": "o"},
+    "robsupport_fixed": {"color": "tab:pink", "size": 400, "node_shape": "s"},
+}
+
+# drawing attributes of each edge type, edges only store their type
+EDGE_STYLES = {
+    "normal": {"color": "black"},
+    "cut": {"edge_style": "dashed", "weight": 1.5, "color": "tab:red"},
+}
+
+
+def node_style(data):
+    """
+    Drawing attributes of a node: those of its node type, else its own (input data).
+
+    Parameters:
+    - data (dict): Node attributes.
+
+    Returns:
+    - tuple: (size, node_shape, color).
+    """
+    style = NODE_STYLES.get(data.get("node_type"), data)
+
+    # 2nd value is the default
+    return style.get("size", 500), style.get("node_shape", "o"), style.get("color", "black")
+
+
+def edge_style(data):
+    """
+    Drawing attributes of an edge: those of its edge type over its own (input data).
+
+    Parameters:
+    - data (dict): Edge attributes.
+
+    Returns:
+    - tuple: (connectionstyle, edge_style, color, weight).
+    """
+    style = EDGE_STYLES.get(data.get("edge_type"), {})
+
+    # 2nd value is the default
+    return (
+        data.get("style", "arc3, rad=0.0"),
+        style.get("edge_style", data.get("edge_style", "solid")),
+        style.get("color", data.get("color", "black")),
+        style.get("weight", data.get("weight", 1.0)),
+    )
+
+
 def edge_draw_settings(G, edges, type):
     for e in edges:
-        if type == "cut":
-            G.edges[e[0], e[1], 0]["edge_style"] = "dashed"
-            G.edges[e[0], e[1], 0]["weight"] = 1.5
-            G.edges[e[0], e[1], 0]["color"] = "tab:red"
-
-            G.edges[e[1], e[0], 0]["edge_style"] = "dashed"
-            G.edges[e[1], e[0], 0]["weight"] = 1.5
-            G.edges[e[1], e[0], 0]["color"] = "tab:red"
+        if type in EDGE_STYLES:
+            G.edges[e[0], e[1], 0]["edge_type"] = type
+            G.edges[e[1], e[0], 0]["edge_type"] = type
 
 
 def node_draw_settings(G, nodes, node_type):
-    attribute_mapping = {
-        "remove": {"node_type": "remove", "color": "tab:red", "size": 600, "node_shape": "8"},
-        "start": {"node_type": "start", "color": "tab:green", "size": 400, "node_shape": "o"},
-        "normal": {"node_type": "normal", "color": "tab:grey", "size": 400, "node_shape": "o"},
-        "remove_start": {
-            "node_type": "remove_start",
-            "color": "tab:red",
-            "size": 600,
-            "node_shape": "8",
-        },
-        "end_foundation": {
-            "node_type": "end_foundation",
-            "color": "black",
-            "size": 600,
-            "node_shape": "8",
-        },
-        "end_2sides_fixed": {
-            "node_type": "end_2sides_fixed",
-            "color": "black",
-            "size": 600,
-            "node_shape": "h",
-        },
-        "end_1sides_fixed": {
-            "node_type": "end_1sides_fixed",
-            "color": "black",
-            "size": 450,
-            "node_shape": "s",
-        },
-        "danger_1side_fixed": {
-            "node_type": "danger_1side_fixed",
-            "color": "tab:orange",
-            "size": 450,
-            "node_shape": "s",
-        },
-        "normal_1side_fixed": {
-            "node_type": "normal_1side_fixed",
-            "color": "tab:grey",
-            "size": 400,
-            "node_shape": "o",
-        },
-        "robsupport_fixed": {
-            "node_type": "robsupport_fixed",
-            "color": "tab:pink",
-            "size": 400,
-            "node_shape": "s",
-        },
-    }
-
     # make into a list if a single variable
     if not isinstance(nodes, list):
         nodes = [nodes]
 
+    if node_type not in NODE_STYLES:
+        return
+
     for n in nodes:
-        attributes = attribute_mapping.get(node_type, {})
-        G.nodes[n].update(attributes)
+        data = G.nodes[n]
+        old = data.get("node_type")
+        data["node_type"] = node_type
+        note_node_type(G, n, old, node_type)
+
+
+def _edge_corners(pos, edges):
+    """Data limits of drawing each edge on its own, (lower left, upper right) per edge."""
+    xy = np.array([(pos[u], pos[v]) for u, v in edges], dtype=float)  # edge, end, dim
+    lo, hi = xy.min(axis=1), xy.max(axis=1)
+    pad = 0.05 * (hi - lo)
+
+    return lo - pad, hi + pad
+
+
+def _arrow_corners(ax, arrow):
+    """Data limits of an arrow at the current view, as add_patch takes them."""
+    arrow._dpi_cor = 1.0  # as before the first draw, which sets it from the figure dpi
+    to_data = arrow.get_transform() - ax.transData
+
+    return to_data.transform(arrow.get_path().get_extents().get_points())
+
+
+def _add_arrows(ax, n_lim, pos, edges, arrows):
+    """
+    Add the arrows of the edges to ax again one by one, in the order of edges, with the
+    data limits of drawing each edge on its own after the nodes. draw_networkx_edges pads
+    the extent of all edges of a call by 5%, so drawing a group of edges at once would
+    widen the view and paint overlapping arrows in group order.
+
+    Parameters:
+    - ax (matplotlib.axes.Axes): The axes drawn on.
+    - n_lim (matplotlib.transforms.Bbox): Data limits after drawing the nodes.
+    - pos (dict): Node positions.
+    - edges (list): (u, v) edges, in drawing order.
+    - arrows (list): The arrow patch of each edge, already drawn on ax.
+    """
+    for arrow in arrows:
+        arrow.remove()
+
+    ax.dataLim.set(n_lim)
+    ax.autoscale_view()
 
+    for arrow, corner_lo, corner_hi in zip(arrows, *_edge_corners(pos, edges)):
+        ax.add_patch(arrow)  # adds the extent of the curved arrow at the current view
+        ax.update_datalim([corner_lo, corner_hi])
+        ax.autoscale_view()
 
-def draw_graph(G, filepath, scale=1, plt_show=False, plt_save=False, plt_text=False):
+
+def _draw_edges(G, pos, n_size):
+    """Draw the edges of G onto the current axes, one draw call per style."""
+    ax = plt.gca()
+    n_lim = ax.dataLim.frozen()
+
+    edges = list(G.edges())
+    e_groups = {}  # (connectionstyle, edge_style, color, weight) -> edge indices
+    for i, (_, _, data) in enumerate(G.edges(data=True)):
+        e_groups.setdefault(edge_style(data), []).append(i)
+
+    arrows = [None] * len(edges)
+    for (c, s, color, weight), ids in e_groups.items():
+        group = nx.draw_networkx_edges(
+            G,
+            pos,
+            node_size=n_size,
+            edgelist=[edges[i] for i in ids],
+            edge_color=color,
+            width=weight,
+            connectionstyle=c,
+            style=s,
+            arrows=True,
+        )
+        for i, arrow in zip(ids, group):
+            arrows[i] = arrow
+
+    if edges:
+        _add_arrows(ax, n_lim, pos, edges, arrows)
+
+
+def figure_fingerprint(G, scale=1, dpi=600, plt_text=False, layout="direct"):
+    """
+    Fingerprint of everything that draw_graph puts in a figure: the nodes in drawing order
+    with their style and position, the edges with their style, the title, the scale, dpi
+    and layout, and the matplotlib version.
+
+    Returns:
+    - str: Hex digest.
+    """
+    pos = _get_node_pos(G, scale)
+
+    data = [
+        [
+            [str(n), node_style(d), [float(x) for x in pos.get(n, ())]]
+            for n, d in G.nodes(data=True)
+        ],
+        [[str(u), str(v), edge_style(d)] for u, v, d in G.edges(data=True)],
+        G.graph.get("title") if plt_text else None,
+        [scale, dpi, layout, mpl.__version__],
+    ]
+
+    return hashlib.sha1(json.dumps(data, default=str).encode()).hexdigest()
+
+
+def draw_graph(
+    G,
+    filepath,
+    scale=1,
+    plt_show=False,
+    plt_save=False,
+    plt_text=False,
+    layout="direct",
+    cache=None,
+):
+    if cache is None or not plt_save or plt_show:
+        _draw_graph(G, filepath, scale, plt_show, plt_save, plt_text, layout)
+        return
+
+    # a saved figure that would not change is not drawn again
+    fingerprint = figure_fingerprint(G, scale, 600, plt_text, layout)
+    if cache.fresh(filepath, fingerprint):
+        trace.info("figure_skipped", filepath=filepath)
+        return
+
+    start = time.perf_counter()
+    _draw_graph(G, filepath, scale, plt_show, plt_save, plt_text, layout)
+    cache.put(filepath, fingerprint, time.perf_counter() - start)
+
+
+def _draw_graph(G, filepath, scale, plt_show, plt_save, plt_text, layout):
     pos_fixed = _get_node_pos(G, scale)  # get location to draw
 
     if scale == 1:
@@ -104,44 +287,28 @@ def draw_graph(G, filepath, scale=1, plt_show=False, plt_save=False, plt_text=Fa
     else:
         f = plt.figure(1)
 
-    pos = nx.spring_layout(G, pos=pos_fixed, fixed=pos_fixed.keys())
+    pos = _layout(G, pos_fixed, layout)
 
+    # one draw call per style, not per node or edge
+    n_groups = {}  # (size, node_shape, color) -> nodes
     n_size = []  # for drawing arrows correct location
     for n, data in G.nodes(data=True):
-        # 2nd value is the default
-        s = data.get("size", 500)
-        n_shape = data.get("node_shape", "o")
-        color = data.get("color", "black")
+        s, n_shape, color = node_style(data)
+        n_groups.setdefault((s, n_shape, color), []).append(n)
 
+        n_size.append(s * scale)  # for correct arrow location
+
+    for (s, n_shape, color), nodes in n_groups.items():
         nx.draw_networkx_nodes(
             G=G,
             pos=pos,
             node_size=s * scale,
-            nodelist=[n],
+            nodelist=nodes,
             node_color=color,
             node_shape=n_shape,
         )
 
-        n_size.append(s * scale)  # for correct arrow location
-
-    for u, v, data in G.edges(data=True):
-        # 2nd value is the default
-        c = data.get("style", "arc3, rad=0.0")
-        s = data.get("edge_style", "solid")
-        color = data.get("color", "black")
-        weight = data.get("weight", 1.0)
-
-        nx.draw_networkx_edges(
-            G,
-            pos,
-            node_size=n_size,
-            edgelist=[(u, v)],
-            edge_color=color,
-            width=weight,
-            connectionstyle=c,
-            style=s,
-            arrows=True,
-        )
+    _draw_edges(G, pos, n_size)
 
     nx.draw_networkx_labels(
         G=G,
@@ -188,3 +355,364 @@ def draw_graph(G, filepath, scale=1, plt_show=False, plt_save=False, plt_text=Fa
         plt.show()
 
     plt.close()
+
+
+class StepRenderer:
+    """
+    Draw a series of graphs with shared node positions, such as the steps of
+    bld_sequence or the subsets of bld_g_sub, into one figure.
+
+    Positions, node groups, arrows and labels are made once and kept. Each step only
+    shows the artists of its graph, makes the missing ones (new node types, cut edges)
+    and sets the title and the view. Figures look like those of draw_graph.
+
+    Parameters:
+    - scale (float): As in draw_graph.
+    - plt_text (bool): Draw the graph title.
+    """
+
+    def __init__(self, scale=1, plt_text=False):
+        self.scale = scale
+        self.plt_text = plt_text
+
+        if scale == 1:
+            self.f = plt.figure(figsize=(11, 8.5))
+        else:
+            self.f = plt.figure()
+        self.ax = self.f.gca()
+
+        # tight_layout starts from the subplot parameters of a new figure at every step
+        sp = self.f.subplotpars
+        self._subplotpars = {
+            k: getattr(sp, k) for k in ["left", "right", "bottom", "top", "wspace", "hspace"]
+        }
+
+        self._pos = {}  # node -> fixed position, None without one
+        self._nodes = {}  # (style, nodes) -> node collection
+        self._edges = {}  # (u, v, key, style, size of u, size of v) -> arrow
+        self._labels = {}  # node -> label
+        self._shown = set()
+
+        # to give a bit of vertical padding
+        self.ax.text(
+            x=0.15,
+            y=1.08,
+            s=" ",
+            fontsize=18,
+            fontweight="bold",
+            ha="left",
+            va="center",
+            transform=self.ax.transAxes,
+        )
+
+        self._title = None
+        if plt_text:
+            self._title = self.ax.text(
+                x=0.04,
+                y=1.07,
+                s="",
+                fontsize=16,
+                fontweight="bold",
+                ha="left",
+                va="center",
+                bbox=dict(facecolor="white", edgecolor="red", boxstyle="round,pad=0.5"),
+                transform=self.ax.transAxes,
+            )
+
+    def _positions(self, G):
+        new = [n for n in G if n not in self._pos]
+        if new:
+            pos_fixed = _get_node_pos(G.subgraph(new), self.scale)
+            self._pos.update((n, pos_fixed.get(n)) for n in new)
+
+        pos_fixed = {n: self._pos[n] for n in G if self._pos[n] is not None}
+
+        return _layout(G, pos_fixed)
+
+    def _update_nodes(self, G, pos):
+        """Show the node groups of G, returns them and the drawn size of each node."""
+        n_groups = {}  # (size, node_shape, color) -> nodes
+        n_size = {}
+        for n, data in G.nodes(data=True):
+            style = node_style(data)
+            n_groups.setdefault(style, []).append(n)
+            n_size[n] = style[0] * self.scale
+
+        shown = []
+        for (s, n_shape, color), nodes in n_groups.items():
+            key = ((s, n_shape, color), tuple(nodes))
+            if key not in self._nodes:
+                self._nodes[key] = nx.draw_networkx_nodes(
+                    G=G,
+                    pos=pos,
+                    node_size=s * self.scale,
+                    nodelist=nodes,
+                    node_color=color,
+                    node_shape=n_shape,
+                    ax=self.ax,
+                )
+            shown.append(self._nodes[key])
+
+        # node groups change with the node types, only keep those of this step
+        for key in [k for k in self._nodes if self._nodes[k] not in shown]:
+            self._nodes.pop(key).remove()
+
+        return shown, n_size
+
+    def _update_edges(self, G, pos, n_size):
+        """Draw the arrows of G not drawn yet, returns the arrow keys of G in edge order."""
+        e_new = {}  # (connectionstyle, edge_style, color, weight) -> edges without an arrow
+        edges = []
+        for u, v, k, data in G.edges(keys=True, data=True):
+            style = edge_style(data)
+            key = (u, v, k, style, n_size[u], n_size[v])
+            if key not in self._edges:
+                e_new.setdefault(style, []).append(key)
+            edges.append(key)
+
+        n_size_list = list(n_size.values())  # in node order, for the arrow ends
+        for (c, s, color, weight), keys in e_new.items():
+            arrows = nx.draw_networkx_edges(
+                G,
+                pos,
+                node_size=n_size_list,
+                edgelist=[key[:2] for key in keys],
+                edge_color=color,
+                width=weight,
+                connectionstyle=c,
+                style=s,
+                arrows=True,
+                ax=self.ax,
+            )
+            self._edges.update(zip(keys, arrows))
+
+        return edges
+
+    def _update_labels(self, G, pos):
+        """Draw the labels of new nodes, returns the labels of G."""
+        new = [n for n in G if n not in self._labels]
+        if new:
+            self._labels.update(
+                nx.draw_networkx_labels(
+                    G=G,
+                    pos=pos,
+                    labels={n: n for n in new},
+                    font_size=6 * (self.scale * 0.8),
+                    font_color="white",
+                    font_weight="bold",
+                    ax=self.ax,
+                )
+            )
+
+        return [self._labels[n] for n in G]
+
+    def _update_view(self, G, pos, edges):
+        """Set the view of G drawn on its own, on the axes of a new figure."""
+        ax = self.ax
+        self.f.subplots_adjust(**self._subplotpars)  # arrow extents are in display units
+
+        ax.ignore_existing_data_limits = True
+        if len(G):
+            ax.update_datalim([pos[n] for n in G])
+        ax.autoscale_view()
+
+        arrows = [self._edges[key] for key in edges]
+        for arrow, corner_lo, corner_hi in zip(arrows, *_edge_corners(pos, [k[:2] for k in edges])):
+            ax.update_datalim(_arrow_corners(ax, arrow))
+            ax.update_datalim([corner_lo, corner_hi])
+            ax.autoscale_view()
+
+    def update(self, G):
+        """Show the graph G."""
+        pos = self._positions(G)
+
+        shown, n_size = self._update_nodes(G, pos)
+        edges = self._update_edges(G, pos, n_size)
+        shown.extend(self._edges[key] for key in edges)
+        shown.extend(self._update_labels(G, pos))
+
+        self._update_view(G, pos, edges)
+
+        for artist in self._shown.difference(shown):
+            artist.set_visible(False)
+        for artist in shown:
+            artist.set_visible(True)
+        self._shown = set(shown)
+
+        if self._title is not None:
+            self._title.set_text(G.graph["title"])
+
+    def layout(self):
+        self.ax.set_axis_on()
+        self.f.subplots_adjust(**self._subplotpars)
+        self.f.tight_layout()
+        self.ax.set_axis_off()  # no border around fig
+
+    def save(self, filepath, dpi=600):
+        self.layout()
+        self.f.savefig(filepath, dpi=dpi)
+
+    def close(self):
+        plt.close(self.f)
+
+
+def draw_graph_series(Gs, filepaths, scale=1, plt_text=False, cache=None):
+    """
+    Save a figure of each graph in a series with shared node positions, see StepRenderer.
+
+    Parameters:
+    - Gs (list): Graphs to draw, e.g. the saved steps of bld_sequence.
+    - filepaths (list): Output path of each figure.
+    - scale (float): As in draw_graph.
+    - plt_text (bool): Draw the graph titles.
+    - cache (FigureCache, optional): Skip figures that would not change.
+
+    Returns:
+    - list: Seconds to draw and save each figure, 0 if skipped, in the order of filepaths.
+    """
+    renderer = StepRenderer(scale, plt_text)
+    times = []
+
+    try:
+        for G, filepath in zip(Gs, filepaths):
+            if cache is not None:
+                fingerprint = figure_fingerprint(G, scale, 600, plt_text)
+                if cache.fresh(filepath, fingerprint):
+                    times.append(0.0)
+                    continue
+
+            t = time.perf_counter()
+            renderer.update(G)
+            renderer.save(filepath)
+            times.append(time.perf_counter() - t)
+
+            if cache is not None:
+                cache.put(filepath, fingerprint, times[-1])
+    finally:
+        renderer.close()
+
+    return times
+
+
+def _animation_writer(filepath, fps):
+    """ffmpeg streams frames to the file as they are grabbed, Pillow keeps them until the end."""
+    if animation.writers.is_available("ffmpeg"):
+        return animation.FFMpegWriter(fps=fps)
+    if filepath.endswith(".gif"):
+        return animation.PillowWriter(fps=fps)
+
+    raise ValueError("no writer for {}, install ffmpeg or save a .gif".format(filepath))
+
+
+def save_animation(Gs, filepath, fps=1, dpi=150, scale=1, plt_text=True, writer=None):
+    """
+    Save a series of graphs as one animation (.gif or .mp4), one frame per graph.
+
+    Frames are drawn with a StepRenderer, which updates its artists between frames. Gs can
+    be a generator or a SnapshotStore, each graph is drawn and written before the next is
+    made.
+
+    Parameters:
+    - Gs (iterable): Graphs to draw, e.g. the saved steps of bld_sequence.
+    - filepath (str): Output path, the extension sets the format.
+    - fps (float): Frames per second.
+    - dpi (int): Resolution of the frames.
+    - scale (float): As in draw_graph.
+    - plt_text (bool): Draw the graph titles.
+    - writer (matplotlib.animation.MovieWriter, optional): Writer to use instead of ffmpeg,
+      or Pillow for a GIF without ffmpeg.
+
+    Returns:
+    - int: Number of frames.
+    """
+    writer = writer or _animation_writer(filepath, fps)
+    renderer = StepRenderer(scale, plt_text)
+    n_frames = 0
+
+    start = time.perf_counter()
+
+    try:
+        with writer.saving(renderer.f, filepath, dpi):
+            for G in Gs:
+                renderer.update(G)
+                renderer.layout()
+                writer.grab_frame()
+                n_frames += 1
+    finally:
+        renderer.close()
+
+    trace.info("animation_saved", filepath=filepath, n=n_frames, time=time.perf_counter() - start)
+
+    return n_frames
+
+
+def _init_draw_worker(backend):
+    mpl.use(backend)
+
+
+def _draw_graph_timed(job):
+    G, filepath, kwargs = job
+
+    t = time.perf_counter()
+    draw_graph(G, filepath, plt_save=True, **kwargs)
+
+    return time.perf_counter() - t
+
+
+def draw_graphs(Gs, filepaths, n_workers=1, backend="Agg", cache=None, **kwargs):
+    """
+    Save a figure of each graph, in worker processes with a non-interactive backend.
+
+    Parameters:
+    - Gs (list): Graphs to draw.
+    - filepaths (list): Output path of each figure.
+    - n_workers (int, optional): Number of worker processes. 1 runs in this process with
+      the current backend, None uses all cores.
+    - backend (str): Matplotlib backend of the workers.
+    - cache (FigureCache, optional): Skip figures that would not change, checked and
+      recorded in this process.
+    - kwargs: scale, plt_text and layout, passed on to draw_graph.
+
+    Returns:
+    - list: Seconds to draw and save each figure, 0 if skipped, in the order of filepaths.
+    """
+    todo = list(range(len(filepaths)))
+    fingerprints = {}
+
+    if cache is not None:
+        for i in todo:
+            fingerprints[i] = figure_fingerprint(
+                Gs[i],
+                kwargs.get("scale", 1),
+                600,
+                kwargs.get("plt_text", False),
+                kwargs.get("layout", "direct"),
+            )
+        todo = [i for i in todo if not cache.fresh(filepaths[i], fingerprints[i])]
+
+    # views are sent as standalone graphs
+    jobs = [(Gs[i].copy() if nx.is_frozen(Gs[i]) else Gs[i], filepaths[i], kwargs) for i in todo]
+
+    start = time.perf_counter()
+
+    if n_workers == 1:
+        times_todo = [_draw_graph_timed(job) for job in jobs]
+    else:
+        n_workers = n_workers or os.cpu_count()
+
+        with ProcessPoolExecutor(
+            n_workers, initializer=_init_draw_worker, initargs=(backend,)
+        ) as pool:
+            times_todo = list(pool.map(_draw_graph_timed, jobs))
+
+    times = [0.0] * len(filepaths)
+    for i, t in zip(todo, times_todo):
+        times[i] = t
+        trace.info("figure_saved", filepath=filepaths[i], time=t)
+
+        if cache is not None:
+            cache.put(filepaths[i], fingerprints[i], t)
+
+    trace.info("figures_saved", n=len(times), time=time.perf_counter() - start, n_workers=n_workers)
+
+    return times
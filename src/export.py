@@ -0,0 +1,275 @@
+import json
+import math
+from xml.sax.saxutils import escape
+
+from src.drawing import node_style, edge_style, _get_node_pos, _layout
+
+# matplotlib's "tab:" colors, the other colors in the data are SVG and Graphviz names
+_TAB_COLORS = {
+    "tab:blue": "#1f77b4",
+    "tab:orange": "#ff7f0e",
+    "tab:green": "#2ca02c",
+    "tab:red": "#d62728",
+    "tab:purple": "#9467bd",
+    "tab:brown": "#8c564b",
+    "tab:pink": "#e377c2",
+    "tab:gray": "#7f7f7f",
+    "tab:grey": "#7f7f7f",
+    "tab:olive": "#bcbd22",
+    "tab:cyan": "#17becf",
+}
+
+# matplotlib marker -> (Graphviz shape, corners of the SVG polygon, rotation in degrees)
+_SHAPES = {
+    "o": ("circle", None, 0),
+    "s": ("box", 4, 45),
+    "8": ("octagon", 8, 22.5),
+    "h": ("hexagon", 6, 0),
+}
+
+
+def _color(color):
+    return _TAB_COLORS.get(color, color)
+
+
+def _dot_id(s):
+    return '"{}"'.format(str(s).replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def _page_size(scale, plt_text):
+    """Page (width, height, padding, top) in points, the figure size of draw_graph."""
+    width, height = (792, 612) if scale == 1 else (460.8, 345.6)
+
+    return width, height, 20, 60 if plt_text else 30
+
+
+def _page_positions(G, scale, plt_text):
+    """Node positions on the page in points, y down, with 5% margins as matplotlib."""
+    width, height, pad, top = _page_size(scale, plt_text)
+
+    pos = _layout(G, _get_node_pos(G, scale))
+
+    xs = [p[0] for p in pos.values()] or [0.0]
+    ys = [p[1] for p in pos.values()] or [0.0]
+    x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+    dx, dy = (x1 - x0) or 1.0, (y1 - y0) or 1.0
+    x0, x1, y0, y1 = x0 - 0.05 * dx, x1 + 0.05 * dx, y0 - 0.05 * dy, y1 + 0.05 * dy
+
+    return {
+        n: (
+            pad + (p[0] - x0) / (x1 - x0) * (width - 2 * pad),
+            top + (y1 - p[1]) / (y1 - y0) * (height - top - pad),
+        )
+        for n, p in pos.items()
+    }
+
+
+def _arc_control(x1, y1, x2, y2, connectionstyle):
+    """Control point of a matplotlib "arc3, rad=r" connection, in y-down coordinates."""
+    rad = 0.0
+    for part in connectionstyle.split(",")[1:]:
+        k, _, v = part.partition("=")
+        if k.strip() == "rad":
+            rad = float(v)
+
+    # arc3 puts the control point at rad times the length, left of the edge with y up
+    return (x1 + x2) / 2 - rad * (y2 - y1), (y1 + y2) / 2 + rad * (x2 - x1)
+
+
+def _toward(x, y, cx, cy, d):
+    """Point at distance d from (x, y) toward (cx, cy)."""
+    length = math.hypot(cx - x, cy - y) or 1.0
+    return x + (cx - x) * d / length, y + (cy - y) * d / length
+
+
+def _svg_node(x, y, size, shape, color):
+    r = math.sqrt(size) / 2  # matplotlib sizes are marker areas in points^2
+
+    _, corners, rotation = _SHAPES.get(shape, _SHAPES["o"])
+    if corners is None:
+        return '<circle cx="{:.2f}" cy="{:.2f}" r="{:.2f}" fill="{}"/>'.format(x, y, r, color)
+
+    if corners == 4:
+        r *= math.sqrt(2)  # the square has sides of 2r, not its corners at r
+
+    points = []
+    for i in range(corners):
+        a = math.radians(rotation + 360 * i / corners - 90)
+        points.append("{:.2f},{:.2f}".format(x + r * math.cos(a), y + r * math.sin(a)))
+
+    return '<polygon points="{}" fill="{}"/>'.format(" ".join(points), color)
+
+
+def write_svg(G, filepath, scale=1, plt_text=False):
+    """
+    Write G as an SVG drawing, without matplotlib. Uses the same positions, node and edge
+    styles and labels as draw_graph, at the size of its figure, in points.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph.
+    - filepath (str): Output path.
+    - scale (float): As in draw_graph.
+    - plt_text (bool): Draw the graph title.
+    """
+    width, height, pad, _ = _page_size(scale, plt_text)
+    page = _page_positions(G, scale, plt_text)
+
+    n_size = {}
+    nodes = []
+    for n, data in G.nodes(data=True):
+        s, n_shape, color = node_style(data)
+        n_size[n] = s * scale
+        nodes.append(_svg_node(*page[n], n_size[n], n_shape, _color(color)))
+
+    markers = {}  # color -> arrowhead id
+    edges = []
+    for u, v, data in G.edges(data=True):
+        c, s, color, weight = edge_style(data)
+        color = _color(color)
+        marker = markers.setdefault(color, "arrow{}".format(len(markers)))
+
+        (xu, yu), (xv, yv) = page[u], page[v]
+        cx, cy = _arc_control(xu, yu, xv, yv, c)
+
+        # end at the node borders, as the arrows of draw_networkx_edges
+        xu, yu = _toward(xu, yu, cx, cy, math.sqrt(n_size[u]) / 2)
+        xv, yv = _toward(xv, yv, cx, cy, math.sqrt(n_size[v]) / 2)
+
+        edges.append(
+            '<path d="M{:.2f},{:.2f} Q{:.2f},{:.2f} {:.2f},{:.2f}" fill="none" stroke="{}" '
+            'stroke-width="{}"{} marker-end="url(#{})"/>'.format(
+                xu,
+                yu,
+                cx,
+                cy,
+                xv,
+                yv,
+                color,
+                weight,
+                ' stroke-dasharray="5,3"' if s == "dashed" else "",
+                marker,
+            )
+        )
+
+    labels = [
+        '<text x="{:.2f}" y="{:.2f}">{}</text>'.format(x, y, escape(str(n)))
+        for n, (x, y) in page.items()
+    ]
+
+    lines = [
+        '<svg xmlns="http://www.w3.org/2000/svg" width="{0}pt" height="{1}pt" '
+        'viewBox="0 0 {0} {1}">'.format(width, height),
+        "<defs>",
+    ]
+    for color, marker in markers.items():
+        lines.append(
+            '<marker id="{}" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" '
+            'markerHeight="6" orient="auto-start-reverse"><path d="M0,0 L10,5 L0,10 z" '
+            'fill="{}"/></marker>'.format(marker, color)
+        )
+    lines.append("</defs>")
+    lines.append('<rect width="100%" height="100%" fill="white"/>')
+    lines.extend(edges)
+    lines.extend(nodes)
+    lines.append(
+        '<g font-family="DejaVu Sans, sans-serif" font-size="{:.2f}" font-weight="bold" '
+        'fill="white" text-anchor="middle" dominant-baseline="central">'.format(6 * scale * 0.8)
+    )
+    lines.extend(labels)
+    lines.append("</g>")
+
+    if plt_text:
+        title = str(G.graph.get("title", ""))
+        lines.append(
+            '<rect x="{}" y="16" width="{:.0f}" height="28" rx="6" fill="white" '
+            'stroke="red"/>'.format(pad, 0.62 * 16 * len(title) + 16)  # about the title width
+        )
+        lines.append(
+            '<text x="{}" y="30" font-family="DejaVu Sans, sans-serif" font-size="16" '
+            'font-weight="bold" dominant-baseline="central">{}</text>'.format(
+                pad + 8, escape(title)
+            )
+        )
+
+    lines.append("</svg>")
+
+    with open(filepath, "w") as outfile:
+        outfile.write("\n".join(lines) + "\n")
+
+
+def write_dot(G, filepath, scale=1):
+    """
+    Write G as a Graphviz DOT file, with the node and edge styles of draw_graph. Nodes
+    are pinned at the positions of write_svg, in points (`neato -n2`).
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph.
+    - filepath (str): Output path.
+    - scale (float): As in draw_graph.
+    """
+    _, height, _, _ = _page_size(scale, False)
+    page = _page_positions(G, scale, False)
+
+    lines = [
+        "digraph {} {{".format(_dot_id(G.graph.get("title", "G"))),
+        '    node [style=filled, fontcolor=white, fontname="Helvetica-Bold", fixedsize=true];',
+    ]
+
+    for n, data in G.nodes(data=True):
+        s, n_shape, color = node_style(data)
+        x, y = page[n]
+        attrs = [
+            "shape={}".format(_SHAPES.get(n_shape, _SHAPES["o"])[0]),
+            "fillcolor={}".format(_dot_id(_color(color))),
+            "color={}".format(_dot_id(_color(color))),
+            "width={:.3f}".format(math.sqrt(s * scale) / 72),  # inches
+            'pos="{:.2f},{:.2f}!"'.format(x, height - y),  # y up
+        ]
+
+        lines.append("    {} [{}];".format(_dot_id(n), ", ".join(attrs)))
+
+    for u, v, data in G.edges(data=True):
+        _, s, color, weight = edge_style(data)
+        lines.append(
+            "    {} -> {} [color={}, style={}, penwidth={}];".format(
+                _dot_id(u), _dot_id(v), _dot_id(_color(color)), s, weight
+            )
+        )
+
+    lines.append("}")
+
+    with open(filepath, "w") as outfile:
+        outfile.write("\n".join(lines) + "\n")
+
+
+def write_node_link(G, filepath):
+    """
+    Write G as node-link JSON (the format of networkx.node_link_data), with the drawing
+    styles resolved: "color", "size" and "node_shape" on nodes, "color", "edge_style" and
+    "weight" on edges.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph.
+    - filepath (str): Output path.
+    """
+    nodes = []
+    for n, data in G.nodes(data=True):
+        s, n_shape, color = node_style(data)
+        nodes.append(dict(data, id=n, color=color, size=s, node_shape=n_shape))
+
+    links = []
+    for u, v, key, data in G.edges(keys=True, data=True):
+        c, s, color, weight = edge_style(data)
+        links.append(dict(data, source=u, target=v, key=key, style=c, edge_style=s))
+        links[-1].update(color=color, weight=weight)
+
+    data = {
+        "directed": G.is_directed(),
+        "multigraph": G.is_multigraph(),
+        "graph": dict(G.graph),
+        "nodes": nodes,
+        "links": links,
+    }
+
+    with open(filepath, "w") as outfile:
+        json.dump(data, outfile, indent=4, default=str)
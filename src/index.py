@@ -0,0 +1,523 @@
+import weakref
+from collections import deque
+
+import networkx as nx
+
+
+# one index per graph object, dropped together with the graph
+_FIXED_INDEX = weakref.WeakKeyDictionary()
+_TYPE_INDEX = weakref.WeakKeyDictionary()
+_COMPONENT_INDEX = weakref.WeakKeyDictionary()
+
+# structural changes of a graph not made by remove_nodes / add_nodes, see mark_changed
+_VERSION = weakref.WeakKeyDictionary()
+
+# node -> node type before the first change since record_node_types, per graph
+_RETYPED = weakref.WeakKeyDictionary()
+
+
+class FixedIndex:
+    """
+    Fixed connections (edges in both directions) of every node in a graph.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph to index.
+    """
+
+    def __init__(self, G):
+        succ = {n: set(G.successors(n)) for n in G.nodes()}
+
+        self.partners = {u: {v for v in vs if u in succ[v]} for u, vs in succ.items()}
+        self.version = _VERSION.get(G, 0)
+
+    def __len__(self):
+        return len(self.partners)
+
+    def copy(self):
+        index = FixedIndex.__new__(FixedIndex)
+        index.partners = {n: set(ps) for n, ps in self.partners.items()}
+        index.version = self.version
+
+        return index
+
+    def count(self, n):
+        return len(self.partners.get(n, ()))
+
+    def remove(self, nodes):
+        for n in nodes:
+            for p in self.partners.pop(n, ()):
+                self.partners[p].discard(n)
+
+
+def get_fixed_index(G):
+    """
+    Get the fixed connection index of a graph, building it if missing or stale.
+
+    The index is kept up to date by `remove_nodes` and `add_nodes`. It is stale when the
+    number of nodes changed, or after `mark_changed` for any other structural change.
+
+    Parameters:
+    - G (networkx.Graph): The graph.
+
+    Returns:
+    - FixedIndex: The index for G.
+    """
+    index = _FIXED_INDEX.get(G)
+
+    if index is None or index.version != _VERSION.get(G, 0) or len(index) != G.number_of_nodes():
+        index = FixedIndex(G)
+        _FIXED_INDEX[G] = index
+
+    return index
+
+
+def copy_indexes(G, H):
+    """Give H, a copy of G, copies of the indexes of G instead of rebuilding them."""
+    index = _FIXED_INDEX.get(G)
+    if index is not None:
+        _FIXED_INDEX[H] = index.copy()
+        _FIXED_INDEX[H].version = _VERSION.get(H, 0)
+
+    index = _TYPE_INDEX.get(G)
+    if index is not None:
+        _TYPE_INDEX[H] = index.copy()
+
+    index = _COMPONENT_INDEX.get(G)
+    if index is not None:
+        _COMPONENT_INDEX[H] = index.copy()
+
+
+def mark_changed(G):
+    """
+    Record a structural change of a graph not made by `remove_nodes` or `add_nodes`, such
+    as added edges. Its fixed connection index is rebuilt on the next `get_fixed_index`.
+    """
+    _VERSION[G] = _VERSION.get(G, 0) + 1
+
+
+def remove_nodes(G, nodes):
+    """
+    Remove nodes from a graph and update its indexes.
+
+    Parameters:
+    - G (networkx.Graph): The graph.
+    - nodes (list): Nodes to remove.
+    """
+    nodes = list(nodes)
+
+    type_index = _TYPE_INDEX.get(G)
+    if type_index is not None:
+        type_index.remove(G, nodes)
+
+    component_index = _COMPONENT_INDEX.get(G)
+    if component_index is not None:
+        component_index.remove(G, nodes)
+
+    G.remove_nodes_from(nodes)
+
+    index = _FIXED_INDEX.get(G)
+    if index is not None:
+        index.remove(nodes)
+
+
+def add_nodes(G, nodes, edges):
+    """
+    Add nodes back to a graph with their edges, and update its indexes.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph.
+    - nodes (list): (node, attribute dict) tuples.
+    - edges (list): (u, v, key, attribute dict) tuples.
+    """
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+
+    type_index = _TYPE_INDEX.get(G)
+    if type_index is not None:
+        type_index.add(G, [n for n, _ in nodes])
+
+    component_index = _COMPONENT_INDEX.get(G)
+    if component_index is not None:
+        component_index.add(G, [n for n, _ in nodes])
+
+    index = _FIXED_INDEX.get(G)
+    if index is not None:
+        for n, _ in nodes:
+            index.partners.setdefault(n, set())
+        for u, v, _, _ in edges:
+            if G.has_edge(v, u):
+                index.partners[u].add(v)
+                index.partners[v].add(u)
+
+
+class TypeIndex:
+    """
+    Members of each node type in a graph, and the nodes whose relabel conditions may have
+    changed since the last relabel (dirty): nodes with a new type and their successors,
+    and the neighbours of removed nodes.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph to index.
+    """
+
+    def __init__(self, G):
+        self.members = {}  # node type -> set of nodes
+        self.order = {}  # node -> rank in the node order of G
+        self.dirty = set()
+
+        for n, node_type in G.nodes(data="node_type"):
+            self.members.setdefault(node_type, set()).add(n)
+            self.order[n] = len(self.order)
+
+        self._next = len(self.order)
+
+    def __len__(self):
+        return sum(len(ns) for ns in self.members.values())
+
+    def copy(self):
+        index = TypeIndex.__new__(TypeIndex)
+        index.members = {t: set(ns) for t, ns in self.members.items()}
+        index.order = dict(self.order)
+        index.dirty = set(self.dirty)
+        index._next = self._next
+
+        return index
+
+    def count(self, *node_types):
+        return sum(len(self.members.get(t, ())) for t in node_types)
+
+    def types(self):
+        """Node types with at least one member."""
+        return [t for t, ns in self.members.items() if ns]
+
+    def nodes(self, node_types):
+        """Members of any of the node types, in the node order of the graph."""
+        ns = set()
+        for t in node_types:
+            ns.update(self.members.get(t, ()))
+
+        return sorted(ns, key=self.order.get)
+
+    def retype(self, G, n, old, new):
+        self.members[old].discard(n)
+        self.members.setdefault(new, set()).add(n)
+
+        self.dirty.add(n)
+        self.dirty.update(G.successors(n))
+
+    def remove(self, G, nodes):
+        for n in set(nodes):
+            if n in G:
+                self.members[G.nodes[n].get("node_type")].discard(n)
+                del self.order[n]
+                self.dirty.update(G.predecessors(n))
+                self.dirty.update(G.successors(n))
+
+        self.dirty.difference_update(nodes)
+
+    def add(self, G, nodes):
+        for n in nodes:
+            self.members.setdefault(G.nodes[n].get("node_type"), set()).add(n)
+            self.order[n] = self._next
+            self._next += 1
+
+            self.dirty.add(n)
+            self.dirty.update(G.predecessors(n))
+            self.dirty.update(G.successors(n))
+
+    def pop_dirty(self):
+        dirty, self.dirty = self.dirty, set()
+
+        return dirty
+
+
+def track_node_types(G):
+    """Start indexing the node types of G, with nothing dirty."""
+    _TYPE_INDEX[G] = TypeIndex(G)
+
+
+def get_type_index(G):
+    """
+    Get the node type index of a graph, None if it is not tracked or went stale.
+
+    The index is kept up to date by `node_draw_settings`, `remove_nodes` and `add_nodes`.
+    Any other change of nodes or node types needs a call to `drop_type_index`.
+    """
+    index = _TYPE_INDEX.get(G)
+
+    if index is not None and len(index) != G.number_of_nodes():
+        del _TYPE_INDEX[G]
+        index = None
+
+    return index
+
+
+def drop_type_index(G):
+    _TYPE_INDEX.pop(G, None)
+
+
+def record_node_types(G):
+    """Start recording the nodes of G whose node type changes, see `pop_node_types`."""
+    _RETYPED[G] = {}
+
+
+def pop_node_types(G):
+    """
+    Stop recording node type changes of G.
+
+    Returns:
+    - dict: Node -> node type before its first change since `record_node_types`.
+    """
+    return _RETYPED.pop(G, {})
+
+
+def note_node_type(G, n, old, new):
+    """Record a change of node type in the indexes of G, if it has them."""
+    if old == new:
+        return
+
+    retyped = _RETYPED.get(G)
+    if retyped is not None:
+        retyped.setdefault(n, old)
+
+    index = _TYPE_INDEX.get(G)
+    if index is not None:
+        index.retype(G, n, old, new)
+
+    index = _COMPONENT_INDEX.get(G)
+    if index is not None:
+        index.retype(n, old, new)
+
+
+class _LockstepSearch:
+    """
+    Breadth-first searches from the seeds, one node per search in turn, merged when they
+    meet. Used by ComponentIndex to find the pieces a component splits into.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph.
+    - seeds (list): Remaining neighbours of the removed nodes.
+    - removed (set): Nodes about to be removed, not searched.
+    """
+
+    def __init__(self, G, seeds, removed):
+        self.G = G
+        self.removed = removed
+
+        self.group = {}  # search id -> search id it was merged into
+        self.owner = {}  # node -> search id that reached it
+        self.queues, self.reached = {}, {}
+
+        for s in seeds:
+            if s not in self.owner:
+                self.group[s] = s
+                self.owner[s] = s
+                self.queues[s] = deque([s])
+                self.reached[s] = {s}
+
+        self.running = set(self.queues)
+        self.finished = []
+
+    def _find(self, g):
+        group = self.group
+        while group[g] != g:
+            group[g] = group[group[g]]
+            g = group[g]
+        return g
+
+    def _merge(self, g, h):
+        # the searches met: keep the larger one
+        if len(self.reached[h]) < len(self.reached[g]):
+            g, h = h, g
+        self.group[g] = h
+        self.reached[h] |= self.reached.pop(g)
+        self.queues[h].extend(self.queues.pop(g))
+        self.running.discard(g)
+
+        return h
+
+    def _step(self, g):
+        x = self.queues[g].popleft()
+        for y in list(self.G.successors(x)) + list(self.G.predecessors(x)):
+            if y in self.removed:
+                continue
+
+            if y not in self.owner:
+                self.owner[y] = g
+                self.reached[g].add(y)
+                self.queues[g].append(y)
+                continue
+
+            h = self._find(self.owner[y])
+            if h != g:
+                g = self._merge(g, h)
+
+    def pieces(self):
+        """
+        Run the searches until one is left running.
+
+        Returns:
+        - list: Node sets of the pieces that split off. If all searches finished, the
+          largest piece is left out, it keeps the component.
+        """
+        while len(self.running) > 1:
+            for g in list(self.running):
+                if g not in self.running:
+                    continue
+
+                if not self.queues[g]:
+                    self.running.discard(g)
+                    self.finished.append(g)
+                    continue
+
+                self._step(g)
+
+        if not self.running:
+            # all searches finished, the largest piece keeps the component
+            self.finished.sort(key=lambda g: len(self.reached[g]))
+            self.finished.pop()
+
+        return [self.reached[g] for g in self.finished]
+
+
+class ComponentIndex:
+    """
+    Weakly connected components of a graph that only loses nodes, with the number of
+    members in each component that are not of the end types.
+
+    When nodes are removed, searches start from their remaining neighbours in lockstep.
+    The search that is still running when all others finished keeps the component, so
+    only the pieces that split off are relabelled. Components made of end types only are
+    kept in `end_only` as soon as they appear.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The graph to index.
+    - end_types (list): Node types of the end members.
+    """
+
+    def __init__(self, G, end_types):
+        self.end_types = set(end_types)
+
+        self.comp = {}  # node -> component id
+        self.members = {}  # component id -> set of nodes
+        self.n_other = {}  # component id -> number of members not of the end types
+        self.end_only = set()  # component ids with only end types
+        self._next = 0
+
+        for nodes in nx.weakly_connected_components(G):
+            self._new(G, nodes)
+
+    def __len__(self):
+        return len(self.comp)
+
+    def copy(self):
+        index = ComponentIndex.__new__(ComponentIndex)
+        index.end_types = self.end_types
+        index.comp = dict(self.comp)
+        index.members = {c: set(ns) for c, ns in self.members.items()}
+        index.n_other = dict(self.n_other)
+        index.end_only = set(self.end_only)
+        index._next = self._next
+
+        return index
+
+    def _is_other(self, G, n):
+        return G.nodes[n].get("node_type") not in self.end_types
+
+    def _set_other(self, c, n_other):
+        self.n_other[c] = n_other
+
+        if n_other:
+            self.end_only.discard(c)
+        else:
+            self.end_only.add(c)
+
+    def _new(self, G, nodes):
+        c = self._next
+        self._next += 1
+
+        self.members[c] = set(nodes)
+        for n in nodes:
+            self.comp[n] = c
+        self._set_other(c, sum(1 for n in nodes if self._is_other(G, n)))
+
+        return c
+
+    def _drop(self, c):
+        del self.members[c]
+        del self.n_other[c]
+        self.end_only.discard(c)
+
+    def retype(self, n, old, new):
+        c = self.comp.get(n)
+        if c is not None and (old in self.end_types) != (new in self.end_types):
+            self._set_other(c, self.n_other[c] + (1 if old in self.end_types else -1))
+
+    def remove(self, G, nodes):
+        """Update for nodes about to be removed from G."""
+        removed = {n for n in nodes if n in self.comp}
+        seeds = {}  # component id -> remaining neighbours of removed nodes
+
+        for n in removed:
+            c = self.comp.pop(n)
+            self.members[c].discard(n)
+            if self._is_other(G, n):
+                self._set_other(c, self.n_other[c] - 1)
+
+            nbrs = seeds.setdefault(c, set())
+            nbrs.update(G.successors(n))
+            nbrs.update(G.predecessors(n))
+
+        for c, nbrs in seeds.items():
+            if not self.members[c]:
+                self._drop(c)
+            else:
+                self._split(G, c, list(nbrs - removed), removed)
+
+    def _split(self, G, c, seeds, removed):
+        if len(seeds) < 2:
+            return
+
+        for nodes in _LockstepSearch(G, seeds, removed).pieces():
+            self.members[c] -= nodes
+            new = self._new(G, nodes)
+            self._set_other(c, self.n_other[c] - self.n_other[new])
+
+    def add(self, G, nodes):
+        """Update for nodes added to G with their edges."""
+        for n in nodes:
+            self._new(G, [n])
+
+        for n in nodes:
+            for m in list(G.successors(n)) + list(G.predecessors(n)):
+                a, b = self.comp[n], self.comp[m]
+                if a == b:
+                    continue
+
+                # merge the smaller component into the larger
+                if len(self.members[a]) > len(self.members[b]):
+                    a, b = b, a
+                for k in self.members[a]:
+                    self.comp[k] = b
+                self.members[b] |= self.members[a]
+                self._set_other(b, self.n_other[b] + self.n_other[a])
+                self._drop(a)
+
+
+def get_component_index(G, end_types):
+    """
+    Get the component index of a graph, building it if missing or stale.
+
+    The index is kept up to date by `node_draw_settings`, `remove_nodes` and `add_nodes`.
+    """
+    index = _COMPONENT_INDEX.get(G)
+
+    if index is None or len(index) != G.number_of_nodes() or index.end_types != set(end_types):
+        index = ComponentIndex(G, end_types)
+        _COMPONENT_INDEX[G] = index
+
+    return index
+
+
+def drop_component_index(G):
+    _COMPONENT_INDEX.pop(G, None)
@@ -1,3 +1,4 @@
+import csv
 import json
 import pathlib
 
@@ -19,6 +20,17 @@ def _create_file_path(folder, filename):
     return path
 
 
+def parse_pos(pos):
+    """parse a node position, a string like "(0,22.5)", into a tuple of floats without eval.
+    tuples and lists are returned as tuples.
+
+    """
+    if isinstance(pos, str):
+        return tuple(float(x) for x in pos.strip().strip("()").split(","))
+
+    return tuple(pos)
+
+
 def read_json(folder, name):
     p = _create_file_path(folder, name)
 
@@ -28,6 +40,11 @@ def read_json(folder, name):
     edges = a["edge"]
     nodes = a["node"]
 
+    # positions are parsed once here, not at every drawing
+    for data in nodes.values():
+        if "pos" in data:
+            data["pos"] = parse_pos(data["pos"])
+
     return edges, nodes
 
 
@@ -40,3 +57,65 @@ def read_json_subgraph(folder, name):
     # step_data = a[step]
 
     return data
+
+
+def write_table(folder, name, rows):
+    """write a list of row dicts, as CSV or JSON depending on the file extension.
+    list values are space separated in CSV.
+
+    """
+    p = _create_file_path(folder, name)
+
+    if p.suffix == ".csv":
+        with open(p, "w", newline="") as outfile:
+            writer = csv.DictWriter(outfile, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(
+                    {k: " ".join(v) if isinstance(v, list) else v for k, v in row.items()}
+                )
+    else:
+        with open(p, "w") as outfile:
+            json.dump(rows, outfile, indent=4)
+
+
+def read_json_sequence(folder, name):
+    """read a sequence decision script, one dict per step with "rob_support", "remove" and
+    "support" lists. Either a list of steps, or a session file written by write_json_sequence.
+
+    """
+    p = _create_file_path(folder, name)
+
+    with open(p, "r") as infile:
+        data = json.load(infile)
+
+    if isinstance(data, dict):
+        data = data["steps"]
+
+    return [
+        {
+            "rob_support": step.get("rob_support", []),
+            "remove": step.get("remove", []),
+            "support": step.get("support", []),
+        }
+        for step in data
+    ]
+
+
+def write_json_sequence(folder, name, rm_membs, steps, complete=True):
+    """write a sequence session: the target members and the decision of each step.
+
+    The file is written under a temporary name and renamed when done, so an existing file
+    is only replaced by a whole session. An incomplete session (e.g. interrupted) is
+    written to "<name>_interrupted<suffix>" instead, next to the file it would replace.
+
+    """
+    p = pathlib.Path(_create_file_path(folder, name))
+    if not complete:
+        p = p.with_name("{}_interrupted{}".format(p.stem, p.suffix))
+
+    tmp = p.with_name(p.name + ".tmp")
+    with open(tmp, "w") as outfile:
+        json.dump({"rm_membs": rm_membs, "steps": steps}, outfile, indent=4)
+
+    tmp.replace(p)
@@ -0,0 +1,242 @@
+import networkx as nx
+
+from src.algorithms import _check_node_type, _check_connected
+from src.build import bld_subg_single_results
+from src.drawing import node_draw_settings, edge_draw_settings
+from src.index import get_fixed_index, mark_changed
+
+
+class JoinedRemoval:
+    """
+    Joined subgraph for the removal of several members, updated one member at a time.
+
+    After each `add` or `remove`, `K` holds the same nodes, edges and attributes as
+    `bld_subg_multi_remove(G, Ks, rm_membs)` for the current members. Only the nodes around
+    the added or removed member's subgraph are recomputed: the compose of the single
+    subgraphs, the missing edges and the fixed-node checks of STEP B and C.
+
+    Nodes are kept in the order of a full rebuild as long as members are removed in
+    reverse order of adding them, see `set_members`. Edges may be in another order.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The original support hierarchy graph, not modified.
+    - cache (RemovalCache, optional): Cache for the single member removal results.
+    """
+
+    def __init__(self, G, cache=None):
+        self.G = G
+        self.cache = cache
+        self.rm_membs = []
+
+        self.K = nx.MultiDiGraph()
+        self.K.graph.update(G.graph)
+
+        self.fxd_n_cut_rmv = set()  # fully removed fixed nodes of the joined subgraph
+        self.missing_edges = set()  # edges not in any single subgraph
+
+        self._single = {}  # member -> (nodes, node types, cut edges in both directions)
+        self._owners = {}  # node -> members whose subgraph holds it, in member order
+        self._relabel = {}  # node -> node type from the joined STEP C
+
+    def _adjacent(self, n):
+        return set(self.G.successors(n)) | set(self.G.predecessors(n))
+
+    def add(self, rm_memb):
+        """Add a member to the joined removal."""
+        nodes, node_types, e_cut = bld_subg_single_results(self.G, [rm_memb], cache=self.cache)[0]
+
+        nodes = list(self.G.subgraph(nodes))  # node order of the single subgraph view
+        e_cut = set(e_cut) | {(v, u) for u, v in e_cut}
+
+        self._single[rm_memb] = (nodes, node_types, e_cut)
+        self.rm_membs.append(rm_memb)
+
+        entering = [n for n in nodes if n not in self._owners]
+        for n in nodes:
+            self._owners.setdefault(n, []).append(rm_memb)
+
+        # edges between entering nodes are added from the successor side only
+        entering_set = set(entering)
+        self.K.add_nodes_from(entering)
+        for n in entering:
+            for v in self.G.successors(n):
+                if v in self.K:
+                    self.K.add_edges_from((n, v, key) for key in self.G[n][v])
+            for u in self.G.predecessors(n):
+                if u in self.K and u not in entering_set:
+                    self.K.add_edges_from((u, n, key) for key in self.G[u][n])
+
+        self._update(rm_memb, entering)
+
+    def remove(self, rm_memb):
+        """Remove a member from the joined removal."""
+        nodes, _, _ = self._single.pop(rm_memb)
+        self.rm_membs.remove(rm_memb)
+
+        leaving = []
+        for n in nodes:
+            self._owners[n].remove(rm_memb)
+            if not self._owners[n]:
+                del self._owners[n]
+                leaving.append(n)
+
+        self.K.remove_nodes_from(leaving)
+        self.missing_edges = {(u, v) for u, v in self.missing_edges if u in self.K and v in self.K}
+
+        self._update(rm_memb, leaving, nodes)
+
+    def set_members(self, rm_membs):
+        """
+        Update to the members rm_membs, in their order. Members after the longest common
+        prefix with the current members are removed in reverse order, then the others added,
+        so K is the same as a full rebuild, node order included.
+        """
+        n = 0
+        while n < min(len(self.rm_membs), len(rm_membs)) and self.rm_membs[n] == rm_membs[n]:
+            n += 1
+
+        for rm_memb in reversed(self.rm_membs[n:]):
+            self.remove(rm_memb)
+        for rm_memb in rm_membs[n:]:
+            self.add(rm_memb)
+
+    def _update(self, rm_memb, changed, nodes=None):
+        if nodes is None:
+            nodes = self._single[rm_memb][0]
+
+        mark_changed(self.K)
+
+        dirty, cut_changed = self._update_cut(changed)
+        check = self._update_support(rm_memb, changed, dirty, cut_changed)
+        self._restyle(nodes, check, cut_changed)
+
+        self.K.graph["title"] = " & ".join(self.rm_membs)
+
+    def _update_cut(self, changed):
+        """
+        STEP B, fully removed fixed nodes. Only changes next to nodes entering or leaving K.
+
+        Returns:
+        - tuple: The nodes next to the changed nodes, and the nodes whose cut status changed.
+        """
+        K = self.K
+        partners = get_fixed_index(self.G).partners
+
+        dirty = set(changed)
+        for n in changed:
+            dirty |= self._adjacent(n)
+
+        cut_changed = set()
+        for n in dirty:
+            cut = n in K and bool(partners[n]) and self._adjacent(n).issubset(K)
+            if cut != (n in self.fxd_n_cut_rmv):
+                self.fxd_n_cut_rmv ^= {n}
+                cut_changed.add(n)
+
+        return dirty, cut_changed
+
+    def _update_support(self, rm_memb, changed, dirty, cut_changed):
+        """
+        STEP C, support check, for nodes whose type, supports or cut status may have changed.
+
+        Returns:
+        - set: The checked nodes.
+        """
+        check = dirty | {rm_memb} | self._adjacent(rm_memb) | cut_changed
+        for n in changed + list(cut_changed):
+            check |= set(self.G.predecessors(n))
+
+        for n in check:
+            self._relabel.pop(n, None)
+            if n in self.K:
+                node_type = self._support_type(n)
+                if node_type:
+                    self._relabel[n] = node_type
+
+        return check
+
+    def _restyle(self, nodes, check, cut_changed):
+        """Style the nodes of the member's subgraph and the checked nodes, and their edges."""
+        G, K = self.G, self.K
+
+        for n in (set(nodes) | check) & set(K):
+            self._style_node(n)
+
+        # edges whose owners, existence or cut status changed
+        restyle = set()
+        for n in set(nodes) | cut_changed:
+            if n in K:
+                restyle.update((n, v) for v in G.successors(n) if v in K)
+                restyle.update((u, n) for u in G.predecessors(n) if u in K)
+
+        for pair in {frozenset(e) for e in restyle}:
+            self._style_edges(*pair)
+
+    def _support_type(self, n):
+        """Node type set on n by STEP C of the joined subgraph, or None."""
+        if n in self.rm_membs:
+            return "remove"
+        if n in self.fxd_n_cut_rmv:
+            return "normal_1side_fixed"
+
+        node_type = _check_node_type(self.G, n, self.rm_membs)
+        if node_type not in ["end_2sides_fixed", "danger_1side_fixed"]:
+            return None
+
+        n_safe_fix1, n_safe_fix2, n_notsafe = _check_connected(
+            self.G, self.K, self.fxd_n_cut_rmv, [n]
+        )
+
+        if n_safe_fix1:
+            return "end_1sides_fixed"
+        if n_safe_fix2:
+            return "end_2sides_fixed"
+        if n_notsafe:
+            return "danger_1side_fixed"
+
+        return None
+
+    def _style_node(self, n):
+        # compose: the last single subgraph holding n sets its style
+        node_type = self._relabel.get(n)
+        if node_type is None:
+            node_type = self._single[self._owners[n][-1]][1][n]
+
+        data = self.K.nodes[n]
+        data.clear()
+        data.update(self.G.nodes[n])
+        node_draw_settings(self.K, n, node_type)
+
+    def _style_edges(self, u, v):
+        """Style the edges between u and v, in both directions."""
+        G, K = self.G, self.K
+        es = [(a, b, key) for a, b in [(u, v), (v, u)] if K.has_edge(a, b) for key in K[a][b]]
+
+        for a, b, key in es:
+            data = K.edges[a, b, key]
+            data.clear()
+            data.update(G.edges[a, b, key])
+
+        v_owners = set(self._owners[v])
+        owners = [m for m in self._owners[u] if m in v_owners]
+
+        # compose: single subgraphs apply their edge styles in member order
+        for m in owners:
+            if (u, v) in self._single[m][2]:
+                edge_draw_settings(K, [(u, v)], "cut")
+            else:
+                for a, b, key in es:
+                    K.edges[a, b, key]["edge_type"] = "normal"
+
+        # _add_in_extra_edge
+        for a, b, key in es:
+            if owners:
+                self.missing_edges.discard((a, b))
+            else:
+                K.edges[a, b, key]["edge_type"] = "normal"
+                self.missing_edges.add((a, b))
+
+        # joined STEP B
+        fixed = v in get_fixed_index(G).partners[u]
+        if fixed and (u in self.fxd_n_cut_rmv or v in self.fxd_n_cut_rmv):
+            edge_draw_settings(K, [(u, v)], "cut")
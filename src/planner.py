@@ -0,0 +1,425 @@
+import hashlib
+import heapq
+import itertools
+import math
+import time
+
+from src import trace
+from src.index import copy_indexes
+
+from src.algo_sequence import (
+    find_n_active,
+    select_n_active,
+    set_rob_support,
+    crnt_subg_process,
+    new_subg_relabel,
+)
+
+ACTIVE_TYPES = ["start", "robsupport_fixed"]
+END_TYPES = ["end_2sides_fixed", "end_1sides_fixed", "end_foundation"]
+
+# (removed, supported) counts that _make_graph_title can name
+STEP_SIZES = [(2, 0), (1, 0), (0, 1), (0, 2), (1, 1), (2, 1), (1, 2)]
+
+
+_ZOBRIST = {}
+
+
+def _zobrist(*parts):
+    key = "|".join(parts)
+    z = _ZOBRIST.get(key)
+    if z is None:
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        z = _ZOBRIST[key] = int.from_bytes(digest, "little")
+
+    return z
+
+
+def state_hash(K, rm_membs):
+    """
+    Canonical 64-bit hash of a sequencing state, independent of the steps that led to it.
+
+    The state is the remaining nodes with their node types, and the remaining target
+    members in order. Each (node, node type) pair has a fixed random key (Zobrist hashing),
+    XOR-ed together, so the hash does not depend on node order.
+
+    Parameters:
+    - K (networkx.MultiDiGraph): The current subgraph.
+    - rm_membs (list): Remaining target members.
+
+    Returns:
+    - int: The hash.
+    """
+    h = _zobrist("rm_membs", *rm_membs)
+    for n, node_type in K.nodes(data="node_type"):
+        h ^= _zobrist(n, node_type)
+
+    return h
+
+
+def _copy_state(K):
+    """
+    Copy K for a search state. Steps only remove nodes and set node attributes, so the
+    edge key dicts (with the edge attributes) are shared with K instead of copied.
+    """
+    H = K.__class__()
+    H.graph.update(K.graph)
+    H._node.update((n, dict(data)) for n, data in K._node.items())
+    H._succ.update((u, dict(nbrs)) for u, nbrs in K._succ.items())
+    H._pred.update((v, dict(nbrs)) for v, nbrs in K._pred.items())
+
+    copy_indexes(K, H)
+
+    return H
+
+
+class _Node:
+    """A search state: the subgraph and target list after `depth` steps."""
+
+    __slots__ = ("K", "rm_membs", "parent", "decision", "depth", "g", "h", "key")
+
+    def __init__(self, K, rm_membs, parent=None, decision=None, g=0.0, h=0.0):
+        self.K = K
+        self.rm_membs = rm_membs
+        self.parent = parent
+        self.decision = decision
+        self.depth = parent.depth + 1 if parent else 0
+        self.g = g
+        self.h = h
+        self.key = state_hash(K, rm_membs)
+
+    @property
+    def f(self):
+        return self.g + self.h
+
+    def decisions(self):
+        out = []
+        node = self
+        while node.parent is not None:
+            out.append(node.decision)
+            node = node.parent
+
+        return out[::-1]
+
+
+def apply_decision(K, rm_membs, decision):
+    """
+    Run one step of bld_sequence on K with a given decision, without saving it.
+
+    Parameters:
+    - K (networkx.MultiDiGraph): The current subgraph, modified.
+    - rm_membs (list): Remaining target members, modified.
+    - decision (dict): {"rob_support": [...], "remove": [...], "support": [...]}.
+
+    Returns:
+    - tuple: (removed nodes, supported nodes) of the step.
+    """
+    n_active = find_n_active(K, n_type=ACTIVE_TYPES)
+    n_new_robsupport = set_rob_support(K, decision["rob_support"])
+
+    n_rmv_step, n_robfxd_step = select_n_active(
+        K, n_active, n_new_robsupport, decision["remove"], decision["support"]
+    )
+
+    crnt_subg_process(K, n_rmv_step, rm_membs)
+    new_subg_relabel(K, rm_membs)
+
+    return n_rmv_step, n_robfxd_step
+
+
+class Planner:
+    """
+    Automatic disassembly sequence planner, used by bld_sequence instead of `input()`.
+
+    Each step removes and supports at most `max_removals` and `max_supports` members,
+    with the (removed, supported) combinations of STEP_SIZES. A plan is finished when none
+    of the target members are left. Its cost is `w_step` per step plus `w_support` per
+    supported member.
+
+    Parameters:
+    - strategy (str or callable): "greedy", "beam", "best_first" or "min_steps", or a
+      function (planner, root) -> node, see STRATEGIES.
+    - beam_width (int): States kept per step by the beam search.
+    - w_step (float): Cost of a step.
+    - w_support (float): Cost of a supported member.
+    - w_blocking (float): Heuristic weight of the members resting on targets.
+    - time_budget (float): Seconds before the search returns its best plan so far, and
+      for finishing that plan with greedy steps.
+    - max_expansions (int): Expanded states before the search returns its best plan so far.
+    - transpositions (bool): Prune states already reached at the same or lower cost, by
+      state_hash. The plan's `stats` report the states explored and the pruning rate.
+    """
+
+    def __init__(
+        self,
+        strategy="best_first",
+        beam_width=8,
+        max_removals=2,
+        max_supports=2,
+        w_step=1.0,
+        w_support=0.25,
+        w_blocking=0.25,
+        time_budget=30.0,
+        max_expansions=5000,
+        transpositions=True,
+    ):
+        self.strategy = strategy
+        self.beam_width = beam_width
+        self.max_removals = max_removals
+        self.max_supports = max_supports
+        self.w_step = w_step
+        self.w_support = w_support
+        self.w_blocking = w_blocking
+        self.time_budget = time_budget
+        self.max_expansions = max_expansions
+        self.transpositions = transpositions
+
+        self.table = {}  # state hash -> lowest cost reached
+        self.stats = {}
+
+    def plan(self, K, rm_membs):
+        """
+        Plan a disassembly sequence.
+
+        Parameters:
+        - K (networkx.MultiDiGraph): The joined subgraph, not modified.
+        - rm_membs (list): Target members, not modified.
+
+        Returns:
+        - list: One decision per step, see apply_decision.
+        """
+        self.targets = set(rm_membs)
+        self._start = time.perf_counter()
+        self._best = None
+        self.stats = {"expanded": 0, "generated": 0, "pruned": 0}
+
+        root = _Node(K.copy(), list(rm_membs))
+        root.h = self.heuristic(root)
+        self._consider(root)
+
+        self.table = {root.key: root.g}
+
+        search = STRATEGIES.get(self.strategy, self.strategy)
+        node = search(self, root)
+
+        # out of budget: finish the closest state found with greedy steps, in at most
+        # time_budget more seconds, a plan cut short ends at its last step
+        completed = node is None or not self.is_goal(node)
+        if completed:
+            node = self._best
+            deadline = time.perf_counter() + self.time_budget
+            while not self.is_goal(node) and time.perf_counter() < deadline:
+                children = self.expand(node, prune=False)
+                if not children:
+                    break
+                node = children[0]
+
+        self.stats.update(
+            {
+                "strategy": getattr(search, "__name__", str(search)).lstrip("_"),
+                "time": time.perf_counter() - self._start,
+                "goal": self.is_goal(node),
+                "steps": node.depth,
+                "cost": node.g,
+                "completed_greedy": completed,
+                "explored": len(self.table),
+                "pruning_rate": self.stats["pruned"] / max(self.stats["generated"], 1),
+            }
+        )
+        trace.info("sequence_plan", **self.stats)
+
+        return node.decisions()
+
+    def out_of_budget(self):
+        if self.stats.get("expanded", 0) == 0:
+            return False
+
+        return (
+            self.stats["expanded"] >= self.max_expansions
+            or time.perf_counter() - self._start >= self.time_budget
+        )
+
+    def is_goal(self, node):
+        return not any(n in node.K for n in self.targets)
+
+    def heuristic(self, node):
+        K = node.K
+        left = [n for n in self.targets if n in K]
+
+        blocking = set()
+        for n in left:
+            stack = list(K.predecessors(n))
+            while stack:
+                p = stack.pop()
+                if p not in blocking and p not in self.targets:
+                    blocking.add(p)
+                    stack.extend(K.predecessors(p))
+
+        blocking = [n for n in blocking if K.nodes[n]["node_type"] not in END_TYPES]
+
+        return self.w_step * math.ceil(len(left) / self.max_removals) + self.w_blocking * len(
+            blocking
+        )
+
+    def _consider(self, node):
+        """Keep the best state seen, returned if the budget runs out before a goal."""
+        key = (not self.is_goal(node), node.h, node.g)
+        if self._best is None or key < (not self.is_goal(self._best), self._best.h, self._best.g):
+            self._best = node
+
+    def _support_candidates(self, K, n_active):
+        """Members whose support lets a member below them become a start node."""
+        desired = END_TYPES + ["robsupport_fixed"]
+        candidates = set()
+
+        for n in K.nodes():
+            if n in n_active or K.nodes[n]["node_type"] in desired or K.in_degree(n) > 2:
+                continue
+            for p in K.predecessors(n):
+                if K.nodes[p]["node_type"] not in desired:
+                    candidates.add(p)
+
+        return sorted(candidates)
+
+    def decisions(self, node):
+        """All decisions allowed in the state of `node`."""
+        K = node.K
+        n_active = find_n_active(K, n_type=ACTIVE_TYPES)
+        candidates = self._support_candidates(K, n_active)
+
+        def subsets(items, k_max):
+            for k in range(k_max + 1):
+                yield from itertools.combinations(items, k)
+
+        for rob_support in subsets([n for n in candidates if n not in n_active], self.max_supports):
+            pool = n_active if n_active else list(rob_support)
+
+            for remove in subsets(pool, self.max_removals):
+                options = [
+                    n for n in pool if n not in rob_support and n not in remove and n in candidates
+                ]
+
+                for support in subsets(options, self.max_supports - len(rob_support)):
+                    n_sup = len([n for n in support + rob_support if n not in remove])
+
+                    if (len(remove), n_sup) in STEP_SIZES:
+                        yield {
+                            "rob_support": list(rob_support),
+                            "remove": list(remove),
+                            "support": list(support),
+                        }
+
+    def expand(self, node, prune=True):
+        """
+        Child states of `node`, one per allowed decision, best first.
+
+        With `prune`, states already reached at the same or lower cost are left out. A
+        single path (greedy) does not prune, or it could be left without children.
+        """
+        self.stats["expanded"] += 1
+        children = []
+
+        for decision in self.decisions(node):
+            K = _copy_state(node.K)
+            rm_membs = list(node.rm_membs)
+            _, n_robfxd_step = apply_decision(K, rm_membs, decision)
+
+            g = node.g + self.w_step + self.w_support * len(n_robfxd_step)
+            child = _Node(K, rm_membs, node, decision, g)
+            self.stats["generated"] += 1
+
+            # transposition: the same state was reached by another order of steps
+            if self.transpositions and prune:
+                if self.table.get(child.key, math.inf) <= g:
+                    self.stats["pruned"] += 1
+                    continue
+                self.table[child.key] = g
+            elif g < self.table.get(child.key, math.inf):
+                self.table[child.key] = g
+
+            child.h = self.heuristic(child)
+
+            self._consider(child)
+            children.append(child)
+
+        return sorted(children, key=lambda c: c.f)
+
+
+def _greedy(planner, root):
+    node = root
+    while not planner.is_goal(node) and not planner.out_of_budget():
+        children = planner.expand(node, prune=False)
+        if not children:
+            break
+        node = children[0]
+
+    return node
+
+
+def _beam(planner, root):
+    beam = [root]
+    while beam and not planner.out_of_budget():
+        goals = [node for node in beam if planner.is_goal(node)]
+        if goals:
+            return min(goals, key=lambda c: c.g)
+
+        children = []
+        for node in beam:
+            children.extend(planner.expand(node))
+            if planner.out_of_budget():
+                break
+
+        beam = sorted(children, key=lambda c: c.f)[: planner.beam_width]
+
+    return None
+
+
+def _best_first(planner, root):
+    counter = itertools.count()
+    heap = [(root.f, next(counter), root)]
+
+    while heap and not planner.out_of_budget():
+        _, _, node = heapq.heappop(heap)
+        if planner.transpositions and planner.table[node.key] < node.g:
+            continue  # reached again at a lower cost since it was pushed
+
+        if planner.is_goal(node):
+            return node
+
+        for child in planner.expand(node):
+            heapq.heappush(heap, (child.f, next(counter), child))
+
+    return None
+
+
+def _min_steps(planner, root):
+    """Breadth-first search, the plan has the fewest steps."""
+    if planner.is_goal(root):
+        return root
+
+    layer = [root]
+    while layer:
+        children = []
+        for node in layer:
+            if planner.out_of_budget():
+                return None
+
+            expanded = planner.expand(node)
+            goals = [child for child in expanded if planner.is_goal(child)]
+            if goals:
+                return min(goals, key=lambda c: c.g)
+
+            children.extend(expanded)
+
+        layer = children
+
+    return None
+
+
+# search strategies by name, each returns a goal node or None if the budget runs out
+STRATEGIES = {
+    "greedy": _greedy,
+    "beam": _beam,
+    "best_first": _best_first,
+    "min_steps": _min_steps,
+}
@@ -0,0 +1,267 @@
+from src.algo_sequence import find_n_active, _make_graph_title
+from src.index import (
+    add_nodes,
+    remove_nodes,
+    note_node_type,
+    drop_type_index,
+    record_node_types,
+    pop_node_types,
+)
+from src.planner import ACTIVE_TYPES, apply_decision
+
+_MISSING = object()
+
+
+def _set_node_attrs(K, n, attrs):
+    data = K.nodes[n]
+    old = data.get("node_type")
+
+    for k, v in attrs.items():
+        if v is _MISSING:
+            data.pop(k, None)
+        else:
+            data[k] = v
+
+    note_node_type(K, n, old, data.get("node_type"))
+
+
+class _SessionState:
+    """
+    A sequencing state, stored as the change from its parent: the removed nodes with
+    their edges, and the old and new attributes of the nodes that were relabelled.
+    """
+
+    def __init__(self, parent=None, decision=None, title="root"):
+        self.parent = parent
+        self.decision = decision
+        self.title = title
+        self.depth = parent.depth + 1 if parent else 0
+        self.children = []
+
+        self.removed = []  # (node, attribute dict)
+        self.edges = []  # (u, v, key, attribute dict) of the removed nodes
+        self.changed = {}  # node -> (old attributes, new attributes), changed keys only
+        self.rm_before = []
+        self.rm_after = []
+
+    def __repr__(self):
+        return "<state {}: {}>".format(self.depth, self.title)
+
+
+class SequenceSession:
+    """
+    Branching disassembly sequence session, with undo to any earlier step.
+
+    States form a tree that shares the steps they have in common. Only one graph, `K`, is
+    kept; moving between states undoes and redoes the steps in between, so a jump costs
+    the nodes changed by those steps and not a rebuild from the joined subgraph. Node
+    order in `K` may differ after a jump, decisions refer to nodes by name.
+
+    Parameters:
+    - K (networkx.MultiDiGraph): The joined subgraph, not modified.
+    - rm_membs (list): Target members, not modified.
+    """
+
+    def __init__(self, K, rm_membs):
+        self.K = K.copy()
+        self.rm_membs = list(rm_membs)
+
+        self.root = _SessionState()
+        self.root.rm_after = list(rm_membs)
+        self.current = self.root
+
+        self.branches = {"main": self.root}
+        self.branch = "main"
+
+    def active(self):
+        """Active nodes of the current state, to remove or support."""
+        return find_n_active(self.K, n_type=ACTIVE_TYPES)
+
+    def step(self, decision):
+        """
+        Make a step from the current state, on the current branch.
+
+        Parameters:
+        - decision (dict): {"rob_support": [...], "remove": [...], "support": [...]}.
+
+        Returns:
+        - _SessionState: The new state.
+        """
+        K = self.K
+        decision = {k: list(decision.get(k, [])) for k in ["rob_support", "remove", "support"]}
+
+        rm_before = list(self.rm_membs)
+
+        # only node types change in a step, the undo record is built from the retyped nodes
+        removed = {}
+        edges = {}
+        for n in decision["remove"]:
+            if n in K:
+                removed[n] = dict(K.nodes[n])
+                for u, v, key, data in K.out_edges(n, keys=True, data=True):
+                    edges[u, v, key] = dict(data)
+                for u, v, key, data in K.in_edges(n, keys=True, data=True):
+                    edges[u, v, key] = dict(data)
+
+        record_node_types(K)
+        try:
+            n_rmv_step, n_robfxd_step = apply_decision(K, self.rm_membs, decision)
+        except ValueError:
+            # undo the styling done before the decision was found invalid
+            for n, old in pop_node_types(K).items():
+                _set_node_attrs(K, n, {"node_type": _MISSING if old is None else old})
+            drop_type_index(K)
+            self.rm_membs = rm_before
+            raise
+        retyped = pop_node_types(K)
+
+        state = _SessionState(
+            self.current,
+            decision,
+            _make_graph_title(self.current.depth + 1, n_rmv_step, n_robfxd_step),
+        )
+        state.removed = [(n, removed[n]) for n in n_rmv_step]
+        state.edges = [e + (data,) for e, data in edges.items()]
+        state.rm_before = rm_before
+        state.rm_after = list(self.rm_membs)
+
+        for n, old in retyped.items():
+            new = K.nodes[n].get("node_type") if n in K else old
+            if new != old:
+                state.changed[n] = (
+                    {"node_type": _MISSING if old is None else old},
+                    {"node_type": new},
+                )
+
+        self.current.children.append(state)
+        self.current = state
+        self.branches[self.branch] = state
+
+        return state
+
+    def _undo(self, state):
+        K = self.K
+        add_nodes(K, state.removed, state.edges)
+
+        for n, (old, _) in state.changed.items():
+            _set_node_attrs(K, n, old)
+
+        self.rm_membs = list(state.rm_before)
+
+    def _redo(self, state):
+        K = self.K
+        remove_nodes(K, [n for n, _ in state.removed])
+
+        for n, (_, new) in state.changed.items():
+            _set_node_attrs(K, n, new)
+
+        self.rm_membs = list(state.rm_after)
+
+    @staticmethod
+    def _path(a, b):
+        """States to undo from a and to redo towards b, through their last common state."""
+        up, down = [], []
+
+        while a.depth > b.depth:
+            up.append(a)
+            a = a.parent
+        while b.depth > a.depth:
+            down.append(b)
+            b = b.parent
+        while a is not b:
+            up.append(a)
+            down.append(b)
+            a, b = a.parent, b.parent
+
+        return up, down[::-1]
+
+    def goto(self, state):
+        """Move to a state, or to the tip of a branch by name. Stays on the current branch."""
+        if isinstance(state, str):
+            state = self.branches[state]
+
+        up, down = self._path(self.current, state)
+
+        for s in up:
+            self._undo(s)
+        for s in down:
+            self._redo(s)
+
+        self.current = state
+
+        return state
+
+    def undo(self, n_steps=1):
+        """Go back n steps. The next step forks from there on the current branch."""
+        state = self.current
+        for _ in range(n_steps):
+            if state.parent is None:
+                break
+            state = state.parent
+
+        return self.goto(state)
+
+    def fork(self, name):
+        """Start a new branch at the current state and switch to it."""
+        if name in self.branches:
+            raise ValueError("branch {} already exists".format(name))
+
+        self.branches[name] = self.current
+        self.branch = name
+
+    def checkout(self, name):
+        """Switch to a branch and move to its last state."""
+        self.goto(self.branches[name])
+        self.branch = name
+
+    def script(self, state=None):
+        """Decisions from the start to a state, to replay with bld_sequence."""
+        state = state or self.current
+
+        decisions = []
+        while state.parent is not None:
+            decisions.append(state.decision)
+            state = state.parent
+
+        return decisions[::-1]
+
+    def compare(self, a, b):
+        """
+        Compare two states, or branches by name, from the steps since their common state.
+
+        Returns:
+        - dict: "common_steps", the nodes "removed" in only one of them, and the
+          different "node_types" as node -> (type in a, type in b), None if removed.
+        """
+        a = self.branches[a] if isinstance(a, str) else a
+        b = self.branches[b] if isinstance(b, str) else b
+        up, down = self._path(a, b)
+
+        def changes(states):
+            removed, first, last = set(), {}, {}
+            for s in states:
+                for n, data in s.removed:
+                    removed.add(n)
+                    first.setdefault(n, data.get("node_type"))
+                    last[n] = None
+                for n, (old, new) in s.changed.items():
+                    if "node_type" in new:
+                        first.setdefault(n, old["node_type"])
+                        last[n] = new["node_type"]
+            return removed, first, last
+
+        removed_a, first_a, last_a = changes(up[::-1])
+        removed_b, first_b, last_b = changes(down)
+
+        node_types = {}
+        for n in set(last_a) | set(last_b):
+            common = first_a.get(n, first_b.get(n))
+            type_a, type_b = last_a.get(n, common), last_b.get(n, common)
+            if type_a != type_b:
+                node_types[n] = (type_a, type_b)
+
+        return {
+            "common_steps": a.depth - len(up),
+            "removed": {"a": sorted(removed_a - removed_b), "b": sorted(removed_b - removed_a)},
+            "node_types": node_types,
+        }
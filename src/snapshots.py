@@ -0,0 +1,114 @@
+from collections.abc import Sequence
+
+_MISSING = object()
+
+
+def _diff_attrs(old, new):
+    return {k: v for k, v in new.items() if old.get(k, _MISSING) != v}
+
+
+def _apply_delta(G, delta):
+    removed, nodes, edges, graph = delta
+
+    G.remove_nodes_from(removed)
+
+    for n, data in nodes.items():
+        G.nodes[n].update(data)
+
+    for e, data in edges.items():
+        G.edges[e].update(data)
+
+    G.graph.clear()
+    G.graph.update(graph)
+
+
+class SnapshotStore(Sequence):
+    """
+    Graph states of a disassembly sequence, kept as full copies every `keyframe_every`
+    states and per-state deltas in between: the removed nodes, the changed node and edge
+    attributes (e.g. node_type and edge_type) and the graph attributes.
+
+    Use it like the list of graphs it replaces: `append` a state, index or iterate to get
+    a rebuilt copy. Between appends a graph may only lose nodes and change attributes.
+
+    Parameters:
+    - keyframe_every (int): States between full copies, bounds the deltas applied per access.
+    """
+
+    def __init__(self, keyframe_every=10):
+        self.keyframe_every = keyframe_every
+
+        self._keyframes = {}  # state index -> graph
+        self._deltas = []  # per state: (removed nodes, node attrs, edge attrs, graph attrs)
+        self._last = None  # working copy of the last state, to diff against
+
+    def __len__(self):
+        return len(self._deltas)
+
+    def append(self, K):
+        """Store the current state of K, K is not kept."""
+        i = len(self._deltas)
+
+        if self._last is None:
+            delta = ([], {}, {}, dict(K.graph))
+            self._last = K.copy()
+        else:
+            delta = self._diff(self._last, K)
+            _apply_delta(self._last, delta)
+
+            if self._last.number_of_edges() != K.number_of_edges():
+                raise ValueError("snapshot states may only lose edges with their nodes")
+
+        self._deltas.append(delta)
+
+        if i % self.keyframe_every == 0:
+            self._keyframes[i] = self._last.copy()
+
+    @staticmethod
+    def _diff(last, K):
+        if any(n not in last for n in K):
+            raise ValueError("snapshot states may not gain nodes")
+
+        removed = [n for n in last if n not in K]
+
+        nodes = {}
+        for n, data in K.nodes(data=True):
+            old = last.nodes[n]
+            if data != old:
+                nodes[n] = _diff_attrs(old, data)
+
+        edges = {}
+        for u, v, key, data in K.edges(keys=True, data=True):
+            old = last.edges[u, v, key]
+            if data != old:
+                edges[u, v, key] = _diff_attrs(old, data)
+
+        return removed, nodes, edges, dict(K.graph)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("snapshot index out of range")
+
+        j = i - i % self.keyframe_every
+        G = self._keyframes[j].copy()
+
+        for delta in self._deltas[j + 1 : i + 1]:
+            _apply_delta(G, delta)
+
+        return G
+
+    def __iter__(self):
+        G = None
+
+        for i, delta in enumerate(self._deltas):
+            if i in self._keyframes:
+                G = self._keyframes[i].copy()
+            else:
+                _apply_delta(G, delta)
+
+            yield G.copy()
@@ -0,0 +1,81 @@
+import json
+import time
+
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+_LEVEL_NAMES = {"debug": DEBUG, "info": INFO, "warning": WARNING, "off": OFF}
+
+# current level, checked by callers before building an event: `if trace.level <= trace.DEBUG:`
+level = OFF
+
+_file = None
+_echo = False
+
+
+def _jsonable(o):
+    if isinstance(o, (set, frozenset)):
+        return sorted(o, key=str)
+    return str(o)
+
+
+def configure(level_name="debug", filepath=None, echo=False):
+    """
+    Turn tracing on.
+
+    Parameters:
+    - level_name (str): Lowest level recorded, "debug", "info", "warning" or "off".
+    - filepath (str, optional): JSONL file to append events to.
+    - echo (bool): Also print events to stdout.
+    """
+    global level, _file, _echo
+
+    close()
+
+    level = _LEVEL_NAMES[level_name]
+    _echo = echo
+
+    if filepath:
+        _file = open(filepath, "a")
+
+
+def close():
+    global level, _file
+
+    if _file:
+        _file.close()
+
+    _file = None
+    level = OFF
+
+
+def event(lvl, name, **fields):
+    """
+    Record an event, if tracing is on for this level.
+
+    Parameters:
+    - lvl (int): DEBUG, INFO or WARNING.
+    - name (str): Event name, e.g. "node_type".
+    - fields: Event data, written as JSON.
+    """
+    if lvl < level:
+        return
+
+    if _file:
+        record = {"t": time.time(), "level": lvl, "event": name}
+        record.update(fields)
+        _file.write(json.dumps(record, default=_jsonable) + "\n")
+
+    if _echo:
+        print("{}: {}".format(name, ", ".join("{}={}".format(k, v) for k, v in fields.items())))
+
+
+def debug(name, **fields):
+    event(DEBUG, name, **fields)
+
+
+def info(name, **fields):
+    event(INFO, name, **fields)
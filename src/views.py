@@ -0,0 +1,137 @@
+from collections import ChainMap
+from collections.abc import Mapping
+
+import networkx as nx
+
+from src.drawing import node_draw_settings, edge_draw_settings
+
+
+class _OverlayAtlas(Mapping):
+    """
+    Node attribute mapping of an overlay view. Each node reads through a ChainMap, so
+    attribute writes land in a private dict and the base graph is never modified.
+    """
+
+    def __init__(self, atlas):
+        self._atlas = atlas
+        self._maps = {}
+
+    def __len__(self):
+        return len(self._atlas)
+
+    def __iter__(self):
+        return iter(self._atlas)
+
+    def __contains__(self, n):
+        return n in self._atlas
+
+    def __getitem__(self, n):
+        data = self._maps.get(n)
+        if data is None:
+            data = self._maps[n] = ChainMap({}, self._atlas[n])
+        return data
+
+
+class _OverlayAdjacency(Mapping):
+    """
+    Successor (or predecessor) mapping of an overlay view, u -> v -> key -> data. Edge
+    data reads through a ChainMap shared by both directions of the view.
+    """
+
+    def __init__(self, adj, edge_maps, reverse=False):
+        self._adj = adj
+        self._edge_maps = edge_maps
+        self._reverse = reverse
+
+    def __len__(self):
+        return len(self._adj)
+
+    def __iter__(self):
+        return iter(self._adj)
+
+    def __contains__(self, u):
+        return u in self._adj
+
+    def __getitem__(self, u):
+        return _OverlayInner(self, u, self._adj[u])
+
+
+class _OverlayInner(Mapping):
+    def __init__(self, outer, u, nbrs):
+        self._outer = outer
+        self._u = u
+        self._nbrs = nbrs
+
+    def __len__(self):
+        return len(self._nbrs)
+
+    def __iter__(self):
+        return iter(self._nbrs)
+
+    def __contains__(self, v):
+        return v in self._nbrs
+
+    def __getitem__(self, v):
+        uv = (v, self._u) if self._outer._reverse else (self._u, v)
+        return _OverlayKeys(self._outer._edge_maps, uv, self._nbrs[v])
+
+
+class _OverlayKeys(Mapping):
+    def __init__(self, edge_maps, uv, keydict):
+        self._edge_maps = edge_maps
+        self._uv = uv
+        self._keydict = keydict
+
+    def __len__(self):
+        return len(self._keydict)
+
+    def __iter__(self):
+        return iter(self._keydict)
+
+    def __contains__(self, k):
+        return k in self._keydict
+
+    def __getitem__(self, k):
+        e = self._uv + (k,)
+        data = self._edge_maps.get(e)
+        if data is None:
+            data = self._edge_maps[e] = ChainMap({}, self._keydict[k])
+        return data
+
+
+def overlay_view(G, nodes, node_types=None, e_cut=None):
+    """
+    Read-only subgraph view of G with its own node, edge and graph attributes.
+
+    Attributes of G show through until they are set on the view. Setting them (e.g. with
+    node_draw_settings) only affects the view, so analyses can share one graph without
+    copying it. Use `.copy()` to get a standalone graph.
+
+    Parameters:
+    - G (networkx.MultiDiGraph): The base graph.
+    - nodes (list): Nodes in the view.
+    - node_types (dict, optional): Node -> node type, applied with node_draw_settings.
+    - e_cut (set, optional): Fixed edges that are cut, applied with edge_draw_settings.
+
+    Returns:
+    - networkx.MultiDiGraph: The overlay view.
+    """
+    K = nx.subgraph_view(G, filter_node=nx.filters.show_nodes(nodes))
+    K.graph = dict(G.graph)
+
+    edge_maps = {}
+    K._node = _OverlayAtlas(K._node)
+    K._pred = _OverlayAdjacency(K._pred, edge_maps, reverse=True)
+    K._succ = _OverlayAdjacency(K._succ, edge_maps)
+    K._adj = K._succ
+
+    if node_types:
+        for n, node_type in node_types.items():
+            node_draw_settings(K, n, node_type)
+
+    nx.set_edge_attributes(K, "normal", "edge_type")
+
+    if e_cut:
+        edge_draw_settings(K, e_cut, "cut")
+
+    return K